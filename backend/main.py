@@ -27,7 +27,7 @@ def main(args):
         
         if cached_matches:
             print(f"[CACHE] Match data found in Redis (Hash). Using cached data.")
-            matches = json.loads(cached_matches)
+            matches = cached_matches
             # Ensure data is on disk for Analyzer (compat)
             with open(service.output_file, 'w', encoding='utf-8') as f:
                 json.dump(matches, f, indent=4, ensure_ascii=False)
@@ -0,0 +1,118 @@
+import sys
+import os
+import time
+import argparse
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+
+# Path setup
+sys.path.append(os.path.join(os.path.dirname(__file__), '../../'))
+
+from src.services.redis_service import RedisService
+from src.services.json_cleaner import clean_json_matches
+from src.services import analyze, analyze_stakazo, analyze_tiktok
+
+# Runner único de análisis: carga y limpia los partidos del día una sola vez y lanza en paralelo
+# el análisis diario y el stakazo (y TikTok si los partidos de mañana ya están recolectados y aún
+# no tienen análisis). Cada análisis guarda en su propia categoría; el tiempo total es el del más
+# lento en lugar de la suma. analyze.py / analyze_stakazo.py / analyze_tiktok.py siguen funcionando solos.
+
+ANALYSES = ("daily", "stakazo", "tiktok")
+STATUS_NAMES = {"daily": "Daily Analysis", "stakazo": "Stakazo Analysis", "tiktok": "TikTok Analysis"}
+
+
+def load_matches(rs, date_str, category="raw_matches"):
+    """ Partidos del día limpios (clean_json_matches), o None si no hay datos """
+    raw = rs.get_raw_matches(date_str, category=category)
+    if raw is None and category == "raw_matches":
+        raw = rs.decode_payload(rs.get(f"raw_matches:{date_str}"))
+    if not raw:
+        return None
+    print(f"[RUNNER] {category}:{date_str} -> {len(raw)} matches")
+    return clean_json_matches(raw)
+
+
+def tiktok_pending(rs, date_str):
+    """ TikTok entra en el runner solo si sus partidos de mañana están listos y aún no hay análisis """
+    month_key = date_str[:7]
+    done = rs._send_command("HEXISTS", rs._get_key(f"daily_bets_tiktok:{month_key}"), date_str)
+    return not done
+
+
+def _run(name, fn, rs, matches):
+    started = time.monotonic()
+    try:
+        if fn(rs, matches=matches) is False:
+            print(f"[ERROR] {name} analysis produced no bets")
+            if rs.is_active: rs.log_status(STATUS_NAMES[name], "ERROR", "No se generaron apuestas")
+            return name, "ERROR: no bets saved", time.monotonic() - started
+        return name, "OK", time.monotonic() - started
+    except (Exception, SystemExit) as e:
+        print(f"[FATAL] {name} analysis failed: {e}")
+        if rs.is_active: rs.log_status(STATUS_NAMES[name], "ERROR", str(e))
+        return name, f"ERROR: {e}", time.monotonic() - started
+
+
+def run_all(rs, only=None):
+    only = set(only or ANALYSES)
+    today_str = datetime.now().strftime("%Y-%m-%d")
+    tomorrow_str = (datetime.now() + timedelta(days=1)).strftime("%Y-%m-%d")
+    jobs = []
+
+    if only & {"daily", "stakazo"}:
+        today = load_matches(rs, today_str)
+        if today:
+            if "daily" in only: jobs.append(("daily", analyze._analyze_logic, today))
+            if "stakazo" in only: jobs.append(("stakazo", analyze_stakazo._analyze_logic, today))
+        else:
+            print(f"[RUNNER] No matches for {today_str}")
+            if rs.is_active: rs.log_status("Daily Analysis", "IDLE", "No hay datos de partidos para hoy")
+
+    if "tiktok" in only:
+        if not tiktok_pending(rs, tomorrow_str):
+            print(f"[RUNNER] TikTok {tomorrow_str} already analyzed, skipping")
+        else:
+            tiktok = load_matches(rs, tomorrow_str, category="raw_matches_tiktok")
+            if tiktok: jobs.append(("tiktok", analyze_tiktok._analyze_logic, tiktok))
+            else: print(f"[RUNNER] TikTok matches for {tomorrow_str} not ready, skipping")
+
+    if not jobs:
+        return []
+
+    print(f"[RUNNER] Running {', '.join(j[0] for j in jobs)} concurrently")
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=len(jobs)) as pool:
+        results = list(pool.map(lambda job: _run(job[0], job[1], rs, job[2]), jobs))
+    wall = time.monotonic() - started
+
+    for name, outcome, seconds in results:
+        print(f"   - {name}: {outcome} ({seconds:.1f}s)")
+    print(f"[RUNNER] Wall time {wall:.1f}s (sequential would be ~{sum(r[2] for r in results):.1f}s)")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the daily, stakazo and TikTok analyses over one shared cleaned input")
+    parser.add_argument("--only", nargs="+", choices=ANALYSES, help="Subset of analyses (default: all)")
+    parser.add_argument("--mode", choices=("single", "sharded", "auto"), help="Analysis mode (default: ANALYSIS_MODE or single)")
+    args = parser.parse_args()
+    if args.mode: os.environ["ANALYSIS_MODE"] = args.mode
+
+    rs = RedisService()
+    try:
+        rs.log_script_execution("ai_analysis.yml", "START", "Iniciando análisis AI (diario + stakazo)...")
+        results = run_all(rs, only=args.only)
+        failed = [r for r in results if r[1] != "OK"]
+        # Solo el diario decide el resultado del workflow (generate_social_content depende de él);
+        # los fallos de stakazo/TikTok quedan en log_status y en el mensaje
+        daily_failed = any(r[0] == "daily" for r in failed)
+        if rs.is_active:
+            detail = f" Fallidos: {', '.join(r[0] for r in failed)}." if failed else ""
+            rs.log_script_execution("ai_analysis.yml", "FAILURE" if daily_failed else "SUCCESS",
+                                    f"{len(results) - len(failed)}/{len(results)} análisis finalizados.{detail}")
+        if daily_failed: sys.exit(1)
+    except Exception as e:
+        print(f"[FATAL] Analysis runner failed: {e}")
+        if rs.is_active:
+            rs.log_script_execution("ai_analysis.yml", "FAILURE", str(e))
+        raise
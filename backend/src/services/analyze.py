@@ -14,6 +14,10 @@ sys.path.append(os.path.join(os.path.dirname(__file__), '../../'))
 from src.services.redis_service import RedisService
 from src.services.bet_formatter import BetFormatter
 from src.services.json_cleaner import clean_json_matches
+from src.services.prompt_encoder import render_matches, estimate_tokens
+from src.services.prompt_budget import fit_to_budget
+from src.services.gemini_cache import json_response_ok
+from src.services.sharded_analysis import analysis_mode, build_final_prompt
 
 # ENV LOADING (Local Dev)
 try:
@@ -87,7 +91,11 @@ def analyze():
             rs.log_status("Daily Analysis", "ERROR", str(e))
         raise e
 
-def _analyze_logic(rs):
+def _analyze_logic(rs, matches=None):
+    """
+    matches: partidos ya cargados y limpios (analysis_runner); None = leerlos de Redis.
+    Devuelve True si se guardaron las apuestas, False si no (sin datos, init o generación fallida).
+    """
     # 1. Inicialización
     try:
         api_key = os.environ.get("GEMINI_API_KEY")
@@ -102,39 +110,55 @@ def _analyze_logic(rs):
     except Exception as e:
         print(f"[FATAL] Service Init Failed: {e}")
         if rs.is_active: rs.log_status("Daily Analysis", "ERROR", f"Init Failed: {e}")
-        return
+        return False
 
     # 2. Obtención de datos
-    print(f"\n[STEP 1] Fetching Data...")
     today_str = datetime.now().strftime("%Y-%m-%d")
-    raw_json = rs.get_raw_matches(today_str) or rs.get(f"raw_matches:{today_str}")
+    if matches is not None:
+        raw_matches = matches
+        print(f"\n[STEP 1] Using {len(raw_matches)} shared cleaned matches")
+    else:
+        print(f"\n[STEP 1] Fetching Data...")
+        # get_raw_matches decodifica tanto el JSON legacy como el formato comprimido
+        raw_matches = rs.get_raw_matches(today_str) or rs.decode_payload(rs.get(f"raw_matches:{today_str}"))
     
-    if not raw_json:
-        print(f"[ERROR] No raw matches found for {today_str}.")
-        if rs.is_active: rs.log_status("Daily Analysis", "IDLE", "No hay datos de partidos para hoy")
-        return
-
-    raw_matches = json.loads(raw_json)
-    if not raw_matches:
-        print(f"[ERROR] Matches list is empty for {today_str}.")
-        if rs.is_active: rs.log_status("Daily Analysis", "IDLE", "La lista de partidos está vacía")
-        return
+        if raw_matches is None:
+            print(f"[ERROR] No raw matches found for {today_str}.")
+            if rs.is_active: rs.log_status("Daily Analysis", "IDLE", "No hay datos de partidos para hoy")
+            return False
+
+        if not raw_matches:
+            print(f"[ERROR] Matches list is empty for {today_str}.")
+            if rs.is_active: rs.log_status("Daily Analysis", "IDLE", "La lista de partidos está vacía")
+            return False
         
-    print(f"[DATA] Loaded {len(raw_matches)} matches.")
+        print(f"[DATA] Loaded {len(raw_matches)} matches.")
     
-    # --- CLEANING STEP ---
-    raw_matches = clean_json_matches(raw_matches)
-    # ---------------------
+        # --- CLEANING STEP ---
+        raw_matches = clean_json_matches(raw_matches)
+        # ---------------------
     
     fixture_map = {str(m.get("id")): m for m in raw_matches if m.get("id")}
 
     # 3. Preparación del Prompt
     system_instruction = load_system_prompt()
-    full_prompt = f"""
+    full_prompt = None
+    # Modo map-reduce (ANALYSIS_MODE=sharded|auto): preselección por grupos en paralelo y prompt final solo con candidatos
+    if analysis_mode(len(raw_matches)) == "sharded":
+        full_prompt = build_final_prompt(
+            rs, model,
+            genai.types.GenerationConfig(temperature=0.2, response_mime_type='application/json'),
+            system_instruction, raw_matches, header="INPUT DATA (CANDIDATES):", label="ANALYZE"
+        )
+        if not full_prompt: print("[!] Map stage returned no candidates, falling back to the single prompt")
+    if not full_prompt:
+        # Presupuesto de tokens: recorta mercados exóticos / H2H / ligas menores si la jornada no cabe
+        prompt_matches = fit_to_budget(raw_matches, reserved_tokens=estimate_tokens(system_instruction), label="ANALYZE")
+        full_prompt = f"""
 {system_instruction}
 
 INPUT DATA (MATCHES):
-{json.dumps(raw_matches, indent=2)}
+{render_matches(prompt_matches, label="ANALYZE")}
 """
 
     valid_bets = None
@@ -144,16 +168,22 @@ INPUT DATA (MATCHES):
         print(f"[*] Gemini Attempt {i+1}...")
         try:
             # Llamada simple SIN herramientas de búsqueda
-            response = model.generate_content(
+            # Caché por contenido (gemini_cache): un re-lanzamiento con los mismos datos no vuelve a generar.
+            # Solo el primer intento lee la caché; los reintentos siempre generan de nuevo.
+            text = rs.gemini_cache.generate(
+                model,
                 full_prompt,
                 generation_config=genai.types.GenerationConfig(
                     temperature=0.2,
                     response_mime_type='application/json'
-                )
+                ),
+                label="ANALYZE",
+                validate=json_response_ok,
+                use_cache=(i == 0)
             )
             
             # Limpieza básica
-            text = response.text.strip()
+            text = text.strip()
             if text.startswith("```json"): text = text[7:-3]
             if text.startswith("```"): text = text[3:-3]
             
@@ -188,7 +218,7 @@ INPUT DATA (MATCHES):
 
     if not valid_bets: 
         print("[ERROR] Failed to generate bets.")
-        return
+        return False
 
     # 5. Guardado y Formateo
     try:
@@ -223,6 +253,7 @@ INPUT DATA (MATCHES):
     # Status Report
     if rs.is_active: 
         rs.log_status("Daily Analysis", "SUCCESS", f"Analyzed {len(final_output)} bets")
+    return True
 
 if __name__ == "__main__":
     rs = RedisService()
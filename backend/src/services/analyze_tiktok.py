@@ -13,6 +13,10 @@ sys.path.append(os.path.join(os.path.dirname(__file__), '../../'))
 from src.services.redis_service import RedisService
 from src.services.bet_formatter import BetFormatter
 from src.services.json_cleaner import clean_json_matches
+from src.services.prompt_encoder import render_matches, estimate_tokens
+from src.services.prompt_budget import fit_to_budget
+from src.services.gemini_cache import json_response_ok
+from src.services.sharded_analysis import analysis_mode, build_final_prompt
 
 def load_system_prompt(filename="system_prompt_tiktok.txt"):
     try:
@@ -40,7 +44,11 @@ def analyze_tiktok():
         print(f"[FATAL] TikTok Analysis failed: {e}")
         raise e
 
-def _analyze_logic(rs):
+def _analyze_logic(rs, matches=None):
+    """
+    matches: partidos de mañana ya cargados y limpios (analysis_runner); None = leerlos de Redis.
+    Devuelve True si se guardaron las apuestas, False si no.
+    """
     # 1. Initialization
     try:
         api_key = os.environ.get("GEMINI_API_KEY")
@@ -53,7 +61,7 @@ def _analyze_logic(rs):
         
     except Exception as e:
         print(f"[FATAL] Service Init Failed: {e}")
-        return
+        return False
 
     # 2. Fetch Data (TOMORROW)
     now = datetime.now()
@@ -61,44 +69,59 @@ def _analyze_logic(rs):
     target_date_str = tomorrow.strftime("%Y-%m-%d")
     month_key = tomorrow.strftime("%Y-%m")
     
-    print(f"\n[STEP 1] Fetching Data for TikTok (Date: {target_date_str})...")
+    if matches is not None:
+        raw_matches = matches
+        print(f"\n[STEP 1] Using {len(raw_matches)} shared cleaned matches for TikTok ({target_date_str})")
+    else:
+        print(f"\n[STEP 1] Fetching Data for TikTok (Date: {target_date_str})...")
     
-    print(f"\n[STEP 1] Fetching Data for TikTok (Date: {target_date_str})...")
+        print(f"\n[STEP 1] Fetching Data for TikTok (Date: {target_date_str})...")
     
-    # New Format: raw_matches_tiktok:YYYY-MM
-    # Removed Fuzzy Logic - Using Strict Key as requested
-    raw_key = f"raw_matches_tiktok:{month_key}"
-    redis_hash_key = rs._get_key(raw_key)
+        # New Format: raw_matches_tiktok:YYYY-MM
+        # Removed Fuzzy Logic - Using Strict Key as requested
+        raw_key = f"raw_matches_tiktok:{month_key}"
+        redis_hash_key = rs._get_key(raw_key)
 
-    print(f"[DEBUG] Fetching Field: '{target_date_str}' from Key: '{redis_hash_key}'")
-    raw_json = rs._send_command("HGET", redis_hash_key, target_date_str)
+        print(f"[DEBUG] Fetching Field: '{target_date_str}' from Key: '{redis_hash_key}'")
+        raw_matches = rs.get_raw_matches(target_date_str, category="raw_matches_tiktok")
     
-    if not raw_json:
-        print(f"[ERROR] No raw matches found for Field '{target_date_str}' in Key '{redis_hash_key}'.")
-        # Debug: Check if hash exists at all
-        exists = rs._send_command("KEYS", redis_hash_key)
-        print(f"[DEBUG] Key Exists Check for '{redis_hash_key}': {exists}")
-        return
-
-    raw_matches = json.loads(raw_json)
-    if not raw_matches:
-        print(f"[ERROR] Matches list is empty.")
-        return
+        if raw_matches is None:
+            print(f"[ERROR] No raw matches found for Field '{target_date_str}' in Key '{redis_hash_key}'.")
+            # Debug: Check if hash exists at all
+            exists = rs.exists(raw_key)
+            print(f"[DEBUG] Key Exists Check for '{redis_hash_key}': {exists}")
+            return False
+
+        if not raw_matches:
+            print(f"[ERROR] Matches list is empty.")
+            return False
         
-    print(f"[DATA] Loaded {len(raw_matches)} matches.")
+        print(f"[DATA] Loaded {len(raw_matches)} matches.")
     
-    # Clean Data
-    raw_matches = clean_json_matches(raw_matches)
+        # Clean Data
+        raw_matches = clean_json_matches(raw_matches)
     
     fixture_map = {str(m.get("id")): m for m in raw_matches if m.get("id")}
 
     # 3. Prompt
     system_instruction = load_system_prompt()
-    full_prompt = f"""
+    full_prompt = None
+    # Modo map-reduce (ANALYSIS_MODE=sharded|auto): preselección por grupos en paralelo y prompt final solo con candidatos
+    if analysis_mode(len(raw_matches)) == "sharded":
+        full_prompt = build_final_prompt(
+            rs, model,
+            genai.types.GenerationConfig(temperature=0.2, response_mime_type='application/json'),
+            system_instruction, raw_matches, header=f"INPUT DATA (CANDIDATES FOR {target_date_str}):", label="TIKTOK"
+        )
+        if not full_prompt: print("[!] Map stage returned no candidates, falling back to the single prompt")
+    if not full_prompt:
+        # Presupuesto de tokens: recorta mercados exóticos / H2H / ligas menores si la jornada no cabe
+        prompt_matches = fit_to_budget(raw_matches, reserved_tokens=estimate_tokens(system_instruction), label="TIKTOK")
+        full_prompt = f"""
 {system_instruction}
 
 INPUT DATA (MATCHES FOR {target_date_str}):
-{json.dumps(raw_matches, indent=2)}
+{render_matches(prompt_matches, label="TIKTOK")}
 """
 
     valid_bets = None
@@ -107,15 +130,21 @@ INPUT DATA (MATCHES FOR {target_date_str}):
     for i in range(3):
         print(f"[*] Gemini Attempt {i+1}...")
         try:
-            response = model.generate_content(
+            # Caché por contenido (gemini_cache): un re-lanzamiento con los mismos datos no vuelve a generar.
+            # Solo el primer intento lee la caché; los reintentos siempre generan de nuevo.
+            text = rs.gemini_cache.generate(
+                model,
                 full_prompt,
                 generation_config=genai.types.GenerationConfig(
                     temperature=0.2,
                     response_mime_type='application/json'
-                )
+                ),
+                label="TIKTOK",
+                validate=json_response_ok,
+                use_cache=(i == 0)
             )
             
-            text = response.text.strip()
+            text = text.strip()
             if text.startswith("```json"): text = text[7:-3]
             if text.startswith("```"): text = text[3:-3]
             
@@ -154,7 +183,7 @@ INPUT DATA (MATCHES FOR {target_date_str}):
 
     if not valid_bets: 
         print("[ERROR] Failed to generate bets.")
-        return
+        return False
 
     # 5. Save (MANUAL STANDARD STRUCTURE)
     # User requested EXACT format match with main app, but isolated logic.
@@ -222,6 +251,8 @@ INPUT DATA (MATCHES FOR {target_date_str}):
         print(f"[SUCCESS] Saved {len(final_bets_list)} viral bets to Redis Hash: {rs._get_key(redis_hash_key)} -> Field: {target_date_str}")
     except Exception as e:
         print(f"[ERROR] Failed to save to Redis: {e}")
+        return False
+    return True
 
 if __name__ == "__main__":
     analyze_tiktok()
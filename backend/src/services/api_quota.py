@@ -0,0 +1,132 @@
+import os
+import atexit
+import threading
+from datetime import datetime
+
+
+def parse_quota_headers(headers):
+    """
+    Extrae (remaining, limit) de las cabeceras de API-Sports.
+    Probamos varios nombres comunes; remaining es None si no viene ninguno.
+    """
+    remaining = headers.get("remaining") or \
+                headers.get("x-ratelimit-requests-remaining-day") or \
+                headers.get("x-apisports-remaining") or \
+                headers.get("x-ratelimit-requests-remaining") # Fallback al minuto si no hay día
+    limit = int(headers.get("x-ratelimit-requests-limit-day") or
+                headers.get("x-ratelimit-requests-limit") or
+                headers.get("x-apisports-limit") or
+                headers.get("x-ratelimit-limit") or 100)
+    return remaining, limit
+
+
+class ApiQuotaTracker:
+    """
+    Contabilidad de cuota API-Sports coalescida.
+    Mantiene en memoria remaining/limit/last_updated por deporte y el 'usado' del día,
+    y los vuelca a Redis en un único pipeline cada N llamadas y al terminar el proceso.
+    Solo se escriben los valores que han cambiado desde el último volcado.
+    Layout de claves (leído por ApiUsageBanner / system/usage):
+      api_usage:{sport}:last_updated | :remaining | :limit  (STRING)
+      api_usage:history:{YYYY-MM-DD} -> {sport: used}       (HASH)
+    """
+    def __init__(self, rs, flush_every=None):
+        self.rs = rs
+        self.flush_every = flush_every or int(os.getenv("API_QUOTA_FLUSH_EVERY", 25))
+        self._state = {}    # sport -> {"remaining", "limit", "last_updated", "used", "history_date"}
+        self._written = {}  # (key, field) -> último valor persistido
+        self._pending = 0
+        self._lock = threading.Lock()
+        atexit.register(self.flush)
+
+    def record_response(self, sport, resp):
+        """
+        Registra una respuesta de la API. Devuelve el 'remaining' leído (o None si no hay cabecera).
+        Las llamadas servidas desde caché (elapsed <= 0.001s) no cuentan para el historial.
+        """
+        if not resp or not sport:
+            return None
+
+        remaining, limit = parse_quota_headers(resp.headers)
+        elapsed = resp.elapsed.total_seconds()
+        if not remaining:
+            if elapsed > 0.001:
+                print(f"      [DEBUG-QUOTA] {sport}: Ningún header de cuota encontrado en llamada real.")
+                print(f"      [DEBUG-HEADERS] Headers: {list(resp.headers.keys())}")
+            return None
+
+        today = datetime.now().strftime("%Y-%m-%d")
+        with self._lock:
+            st = self._state.setdefault(sport, {})
+            st["remaining"] = str(remaining)
+            st["limit"] = str(limit)
+            st["last_updated"] = today
+            if elapsed > 0.001:
+                try:
+                    st["used"] = str(max(0, limit - int(remaining)))
+                    st["history_date"] = today
+                except ValueError:
+                    pass
+            self._pending += 1
+            due = self._pending >= self.flush_every
+
+        if due:
+            self.flush()
+        return remaining
+
+    def remaining(self, sport):
+        """
+        Último 'remaining' de hoy para el deporte: el de este proceso o, si aún no ha llamado a la API,
+        api_usage:{sport}:remaining de Redis (solo si last_updated es hoy). None si no se conoce.
+        """
+        today = datetime.now().strftime("%Y-%m-%d")
+        with self._lock:
+            st = dict(self._state.get(sport) or {})
+        if not st.get("remaining") and self.rs and self.rs.is_active:
+            res = self.rs._send_pipeline([["GET", self.rs._get_key(f"api_usage:{sport}:{field}")] for field in ("last_updated", "remaining")])
+            if res: st = {"last_updated": res[0], "remaining": res[1]}
+        if st.get("last_updated") != today:
+            return None
+        try:
+            return int(st.get("remaining"))
+        except (TypeError, ValueError):
+            return None
+
+    def flush(self):
+        if not self.rs or not self.rs.is_active:
+            return 0
+
+        with self._lock:
+            self._pending = 0
+            changes = []
+            for sport, st in self._state.items():
+                for field in ("last_updated", "remaining", "limit"):
+                    value = st.get(field)
+                    key = f"api_usage:{sport}:{field}"
+                    if value is not None and self._written.get((key, None)) != value:
+                        changes.append((key, None, value))
+                if st.get("used") is not None:
+                    key = f"api_usage:history:{st['history_date']}"
+                    if self._written.get((key, sport)) != st["used"]:
+                        changes.append((key, sport, st["used"]))
+
+        if not changes:
+            return 0
+
+        commands = []
+        for key, field, value in changes:
+            full_key = self.rs._get_key(key)
+            if field is None:
+                commands.append(["SET", full_key, value])
+            else:
+                commands.append(["HSET", full_key, field, value])
+
+        results = self.rs._send_pipeline(commands)
+        if results is None:
+            print(f"      [REDIS-ERROR] No se pudo volcar la cuota API ({len(commands)} cambios pendientes)")
+            return 0
+
+        with self._lock:
+            for key, field, value in changes:
+                self._written[(key, field)] = value
+        return len(commands)
@@ -7,6 +7,7 @@ from datetime import datetime
 # Add src to path if running directly
 sys.path.append(os.path.join(os.path.dirname(__file__), '../../'))
 from src.services.redis_service import RedisService
+from src.services.pick_compiler import compile_selection
 
 class BetFormatter:
     def __init__(self):
@@ -173,6 +174,11 @@ class BetFormatter:
                     away = parts[1].strip()
                 
                 sel["pick"] = self.translate_pick(sel.get("pick", ""), home, away)
+
+                # 1b. Compile the final pick into a market spec (flag what the checker can't settle)
+                sel["spec"] = compile_selection(sel)
+                if sel["spec"].get("error"):
+                    print(f"[Formatter] Pick no compilable '{sel['pick']}' ({sel.get('match')}): {sel['spec']['error']}")
                 new_selections.append(sel)
             
             # 2. Sort Selections by Time
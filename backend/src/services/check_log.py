@@ -0,0 +1,79 @@
+import os
+import json
+import hashlib
+import threading
+from datetime import datetime
+
+
+CHECK_LOG_TTL = 172800                                          # 2 días (lista, estado y payloads)
+CHECK_LOG_MAX = int(os.getenv("CHECK_LOG_MAX", 1000))           # Ring buffer: entradas por fecha
+PAYLOAD_INLINE_MAX = int(os.getenv("CHECK_LOG_PAYLOAD_INLINE", 200))  # raw_response más largo -> clave aparte
+
+
+def _digest(*parts):
+    return hashlib.sha1("|".join(str(p) for p in parts).encode("utf-8")).hexdigest()[:12]
+
+
+class CheckLog:
+    """
+    Log estructurado del comprobador (panel admin check-logs), acotado por fecha.
+      check_logs:{date}          LIST   entradas JSON compactas; LTRIM a las últimas CHECK_LOG_MAX
+      check_logs_seen:{date}     HASH   huella (selección + estado + mensaje) -> nº de veces visto
+      check_logs_payload:{id}    STRING raw_response grande, con TTL; la entrada solo lleva payload_id
+    Un mismo estado repetido para la misma selección (SKIP "Too Early", PENDING en cada pasada de
+    30 min) se escribe una vez; las repeticiones solo incrementan su contador en el HASH.
+    El HASH se lee una vez por fecha y proceso; las escrituras viajan en el pipeline del EventBuffer.
+    """
+    def __init__(self, rs, max_len=None):
+        self.rs = rs
+        self.max_len = max_len or CHECK_LOG_MAX
+        self._seen = {}   # date -> set(huellas)
+        self._lock = threading.Lock()
+        self.suppressed = 0
+
+    def _seen_for(self, date_str):
+        with self._lock:
+            seen = self._seen.get(date_str)
+        if seen is not None: return seen
+        loaded = set()
+        if self.rs.is_active:
+            raw = self.rs._send_command("HKEYS", self.rs._get_key(f"check_logs_seen:{date_str}"))
+            loaded = set(raw or [])
+        with self._lock:
+            return self._seen.setdefault(date_str, loaded)
+
+    def log(self, date_str, fixture_id, match, pick, status, message, raw_response=None):
+        seen = self._seen_for(date_str)
+        fingerprint = _digest(fixture_id, pick, status, message)
+        seen_key = self.rs._get_key(f"check_logs_seen:{date_str}")
+        with self._lock:
+            repeated = fingerprint in seen
+            seen.add(fingerprint)
+
+        buffer = self.rs.event_buffer
+        buffer.defer(["HINCRBY", seen_key, fingerprint, 1])
+        if repeated:
+            self.suppressed += 1
+            return False
+        buffer.defer(["EXPIRE", seen_key, CHECK_LOG_TTL])
+
+        entry = {
+            "timestamp": datetime.now().strftime("%H:%M:%S"),
+            "fixture_id": str(fixture_id),
+            "match": match,
+            "pick": pick,
+            "status": status,  # INFO, WARN, ERROR, WON, LOST, VOID, SKIP, PENDING
+            "message": message,
+            "id": fingerprint,
+        }
+        if raw_response:
+            raw = str(raw_response)
+            if len(raw) <= PAYLOAD_INLINE_MAX:
+                entry["raw_response"] = raw
+            else:
+                payload_id = _digest(raw)
+                buffer.defer(["SET", self.rs._get_key(f"check_logs_payload:{payload_id}"), raw, "EX", CHECK_LOG_TTL])
+                entry["payload_id"] = payload_id
+
+        buffer.push(f"check_logs:{date_str}", json.dumps(entry, separators=(",", ":")), ttl=CHECK_LOG_TTL, cap=self.max_len)
+        return True
@@ -0,0 +1,121 @@
+import json
+from datetime import datetime, timedelta
+
+
+SETTLE_DELAY_HOURS = 2.5  # Igual que la regla "Too Early" de check_bets
+CLOSED_SELECTION = ["WON", "LOST", "PUSH", "VOID", "NULA"]
+CLOSED_BET = ["WON", "PUSH", "VOID", "MANUAL_CHECK"]
+
+
+class DueIndex:
+    """
+    Índice de selecciones pendientes por hora de liquidación.
+    ZSET due_index: member = "{category}|{date}|{fixture_id}", score = epoch de inicio + 2.5h
+    (0 si la hora no se puede parsear: se comprueba en la siguiente ejecución).
+    Se mantiene al guardar apuestas (save_daily_bets) y al liquidarlas (check_bets).
+    due_index:next guarda la próxima hora de vencimiento para que los schedulers puedan saltarse ejecuciones.
+    """
+    KEY = "due_index"
+    NEXT_KEY = "due_index:next"
+
+    def __init__(self, rs):
+        self.rs = rs
+
+    @staticmethod
+    def member(category, date_str, fixture_id):
+        return f"{category}|{date_str}|{fixture_id}"
+
+    @staticmethod
+    def parse_member(member):
+        parts = str(member).split("|", 2)
+        if len(parts) != 3: return None
+        return tuple(parts)  # (category, date, fixture_id)
+
+    @staticmethod
+    def settle_ts(sel):
+        try:
+            match_time = datetime.strptime(sel["time"], "%Y-%m-%d %H:%M")
+        except Exception:
+            return 0
+        return int((match_time + timedelta(hours=SETTLE_DELAY_HOURS)).timestamp())
+
+    def _day_members(self, category, date_str, day_data):
+        """ (abiertos {member: score}, cerrados {member}) para un documento de día """
+        open_members = {}
+        seen = set()
+        for bet in (day_data or {}).get("bets", []) or []:
+            bet_closed = bet.get("status") in CLOSED_BET
+            for sel in bet.get("selections", []) or []:
+                fid = sel.get("fixture_id")
+                if not fid: continue
+                m = self.member(category, date_str, fid)
+                seen.add(m)
+                if bet_closed or sel.get("status") in CLOSED_SELECTION: continue
+                score = self.settle_ts(sel)
+                # Varias selecciones del mismo partido: vence con la primera
+                open_members[m] = min(score, open_members.get(m, score))
+        return open_members, seen - set(open_members)
+
+    def index_day(self, category, date_str, day_data):
+        """ Sincroniza el índice con un documento de día: ZADD abiertos, ZREM cerrados. Un pipeline. """
+        if not self.rs.is_active: return {}
+        open_members, closed = self._day_members(category, date_str, day_data)
+        full_key = self.rs._get_key(self.KEY)
+        commands = []
+        if open_members:
+            args = []
+            for m, score in open_members.items():
+                args.extend([score, m])
+            commands.append(["ZADD", full_key] + args)
+        if closed:
+            commands.append(["ZREM", full_key] + sorted(closed))
+        if commands:
+            self.rs._send_pipeline(commands)
+        return open_members
+
+    def exists(self):
+        # due_index:next lo escribe check_bets tras cada ejecución (incluido el arranque con escaneo completo):
+        # si no existe, el índice puede estar incompleto aunque save_daily_bets ya haya añadido miembros.
+        return bool(self.rs.exists(self.NEXT_KEY))
+
+    def due(self, now=None):
+        """ Miembros vencidos (score <= now) en un único ZRANGEBYSCORE """
+        now_ts = int((now or datetime.now()).timestamp())
+        res = self.rs._send_command("ZRANGEBYSCORE", self.rs._get_key(self.KEY), "-inf", now_ts)
+        return [p for p in (self.parse_member(m) for m in (res or [])) if p]
+
+    def in_play(self, now=None):
+        """
+        Miembros en juego (inicio <= now < inicio + 2.5h): modo en directo. Los ya vencidos que siguen
+        abiertos (jugador no encontrado, sin datos...) quedan para la ejecución normal.
+        """
+        now = now or datetime.now()
+        now_ts = int(now.timestamp())
+        until_ts = int((now + timedelta(hours=SETTLE_DELAY_HOURS)).timestamp())
+        res = self.rs._send_command("ZRANGEBYSCORE", self.rs._get_key(self.KEY), f"({now_ts}", until_ts)
+        return [p for p in (self.parse_member(m) for m in (res or [])) if p]
+
+    def remove(self, members):
+        if not members: return
+        self.rs._send_command("ZREM", self.rs._get_key(self.KEY), *members)
+
+    def publish_next(self):
+        """ Publica {next_due_ts, next_due, pending} en due_index:next. Devuelve el dict. """
+        full_key = self.rs._get_key(self.KEY)
+        results = self.rs._send_pipeline([
+            ["ZRANGE", full_key, 0, 0, "WITHSCORES"],
+            ["ZCARD", full_key],
+        ]) or [None, None]
+        first, pending = results[0], results[1] or 0
+
+        next_ts = None
+        if first and len(first) >= 2:
+            next_ts = int(float(first[1]))
+        info = {
+            "next_due_ts": next_ts,
+            "next_due": datetime.fromtimestamp(next_ts).strftime("%Y-%m-%d %H:%M:%S") if next_ts is not None else None,
+            "pending": int(pending),
+            "updated": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        }
+        self.rs.set(self.NEXT_KEY, json.dumps(info))
+        return info
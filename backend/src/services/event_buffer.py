@@ -0,0 +1,103 @@
+import os
+import time
+import atexit
+import threading
+from collections import deque, OrderedDict
+
+
+class EventBuffer:
+    """
+    Sink write-behind para listas de logs en Redis (check_logs, execution_history).
+    Acumula entradas en memoria y las vuelca en lote: un RPUSH multi-valor + un EXPIRE por clave
+    (+ LTRIM si la lista tiene tope, ring buffer), todo en un único pipeline. defer() encola comandos
+    sueltos (HINCRBY, SET EX...) que viajan en el mismo volcado. Se vacía al llegar a max_batch entradas, al pasar max_delay segundos
+    desde el último volcado y al salir del proceso (atexit).
+    La cola está acotada (max_queue): si Redis cae, se descartan las entradas más antiguas.
+    """
+    def __init__(self, rs, max_batch=None, max_delay=None, max_queue=None):
+        self.rs = rs
+        self.max_batch = max_batch or int(os.getenv("REDIS_LOG_BATCH", 50))
+        self.max_delay = max_delay or float(os.getenv("REDIS_LOG_FLUSH_SECONDS", 5))
+        self.max_queue = max_queue or int(os.getenv("REDIS_LOG_MAX_QUEUE", 2000))
+
+        self._queue = deque()  # (key, value, ttl, cap); key None = comando diferido
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self._retry_after = 0.0  # backoff tras un volcado fallido
+        self.dropped = 0
+
+        atexit.register(self.flush)
+
+    def push(self, key, value, ttl=None, cap=None):
+        """ cap: la lista conserva solo las últimas `cap` entradas (LTRIM tras el RPUSH) """
+        self._enqueue((key, value, ttl, cap))
+
+    def defer(self, command):
+        """ Comando Redis completo (clave ya prefijada) enviado en el próximo volcado """
+        self._enqueue((None, command, None, None))
+
+    def _enqueue(self, item):
+        with self._lock:
+            if len(self._queue) >= self.max_queue:
+                self._queue.popleft()
+                self.dropped += 1
+            self._queue.append(item)
+            now = time.monotonic()
+            due = len(self._queue) >= self.max_batch or (now - self._last_flush) >= self.max_delay
+
+        if due and now >= self._retry_after:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            if not self._queue:
+                self._last_flush = time.monotonic()
+                return 0
+            batch = list(self._queue)
+            self._queue.clear()
+            self._last_flush = time.monotonic()
+
+        # Agrupar por clave manteniendo el orden de llegada
+        grouped = OrderedDict()
+        deferred = []
+        for key, value, ttl, cap in batch:
+            if key is None:
+                deferred.append(value)
+                continue
+            entry = grouped.setdefault(key, {"values": [], "ttl": None, "cap": None})
+            entry["values"].append(value)
+            if ttl: entry["ttl"] = ttl
+            if cap: entry["cap"] = cap
+
+        commands = []
+        for key, entry in grouped.items():
+            full_key = self.rs._get_key(key)
+            commands.append(["RPUSH", full_key] + entry["values"])
+            if entry["cap"]:
+                commands.append(["LTRIM", full_key, -int(entry["cap"]), -1])
+            if entry["ttl"]:
+                commands.append(["EXPIRE", full_key, entry["ttl"]])
+        commands.extend(deferred)
+
+        results = self.rs._send_pipeline(commands)
+        if results is None:
+            self._requeue(batch)
+            return 0
+
+        if self.dropped:
+            print(f"[Redis/Buffer] {self.dropped} log entries dropped (queue full)")
+            self.dropped = 0
+        return len(batch)
+
+    def _requeue(self, batch):
+        """Devuelve el lote fallido a la cabeza de la cola sin superar max_queue."""
+        with self._lock:
+            self._retry_after = time.monotonic() + self.max_delay
+            room = self.max_queue - len(self._queue)
+            if room <= 0:
+                self.dropped += len(batch)
+                return
+            keep = batch[-room:]
+            self.dropped += len(batch) - len(keep)
+            self._queue.extendleft(reversed(keep))
+        print(f"[Redis/Buffer] Flush failed, {len(keep)} entries kept in memory")
@@ -113,23 +113,8 @@ class SportsDataService:
                             self.rs = RedisService()
                         
                         if self.rs.is_active:
-                            # 1. Obtener Límite Real
-                            limit = int(headers.get("x-ratelimit-requests-limit-day") or 
-                                        headers.get("x-ratelimit-requests-limit") or 
-                                        headers.get("x-apisports-limit") or 
-                                        headers.get("x-ratelimit-limit") or 100)
-
-                            # 2. Actualizamos "Restantes" y "Límite" en Redis siempre
-                            self.rs.set(f"api_usage:{sport}:last_updated", datetime.now().strftime("%Y-%m-%d"))
-                            self.rs.set(f"api_usage:{sport}:remaining", remaining)
-                            self.rs.set(f"api_usage:{sport}:limit", limit)
-                            
-                            # 3. Actualizamos el "Historial" solo si es una llamada física real
-                            if is_real_call:
-                                used = max(0, limit - int(remaining))
-                                today = datetime.now().strftime("%Y-%m-%d")
-                                history_key = f"api_usage:history:{today}"
-                                self.rs.hset(history_key, {sport: used})
+                            # Remaining / Límite / Historial: en memoria, volcado en lote (sin escrituras repetidas)
+                            self.rs.quota_tracker.record_response(sport, resp)
                         else:
                             print(f"      [REDIS-WARN] Redis no activo, no se pudo actualizar cuota.")
                     except Exception as e:
@@ -202,6 +187,10 @@ class SportsDataService:
         rem_f = self.api_remaining_football if hasattr(self, 'api_remaining_football') else "Unknown"
         rem_b = self.api_remaining_basketball if hasattr(self, 'api_remaining_basketball') else "Unknown"
         print(f"[RESTANTE REPORTADO] Fútbol: {rem_f}/100 | Basket: {rem_b}/100")
+        
+        # Volcado único de la cuota acumulada durante la recolección
+        if hasattr(self, 'rs') and self.rs.is_active:
+            self.rs.quota_tracker.flush()
         print(f"Archivo: {self.output_file}")
         
         return all_matches
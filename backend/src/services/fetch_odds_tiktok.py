@@ -87,24 +87,8 @@ class SportsDataServiceTikTok:
                 if sport:
                     try:
                         if self.rs.is_active:
-                            # 1. Obtener Límite Real
-                            limit = int(headers.get("x-ratelimit-requests-limit-day") or 
-                                        headers.get("x-ratelimit-requests-limit") or 
-                                        headers.get("x-apisports-limit") or 
-                                        headers.get("x-ratelimit-limit") or 100)
-
-                            # 2. Actualizar "Restantes" y "Límite" siempre
-                            self.rs.set(f"api_usage:{sport}:last_updated", datetime.now().strftime("%Y-%m-%d"))
-                            self.rs.set(f"api_usage:{sport}:remaining", remaining)
-                            self.rs.set(f"api_usage:{sport}:limit", limit)
-                            
-                            # 3. Actualizar "Historial/Usadas" SOLO si es llamada real (> 0.001s)
-                            if elapsed > 0.001:
-                                used = max(0, limit - int(remaining))
-                                today = datetime.now().strftime("%Y-%m-%d")
-                                history_key = f"api_usage:history:{today}"
-                                self.rs.hset(history_key, {sport: used})
-                                # print(f"      [API-REAL] Llamada contabilizada: {used}/{limit}")
+                            # Remaining / Límite / Historial: en memoria, volcado en lote (sin escrituras repetidas)
+                            self.rs.quota_tracker.record_response(sport, resp)
                         else:
                             print(f"      [REDIS-WARN] Redis no activo en TikTok Fetcher.")
                     except Exception as e:
@@ -164,8 +148,8 @@ class SportsDataServiceTikTok:
         month_key = tomorrow.strftime("%Y-%m")
         redis_hash_key = f"raw_matches_tiktok:{month_key}"
         
-        # Guardar en Redis usando la instancia de la clase
-        self.rs.client.hset(redis_hash_key, {target_date_str: json.dumps(all_matches)})
+        # Guardar en Redis usando la instancia de la clase (codec comprimido)
+        self.rs.save_raw_matches(target_date_str, all_matches, category="raw_matches_tiktok")
         
         print(f"[REDIS] Guardado en Hash {self.rs._get_key(redis_hash_key)} -> Field {target_date_str}")
             
@@ -173,6 +157,10 @@ class SportsDataServiceTikTok:
         print(f"[CONSUMO] Fútbol: {self.calls_football}")
         print(f"[API REAL] Cuota Restante (x-ratelimit-requests-remaining-day): {self.api_remaining}")
         
+        # Volcado único de la cuota acumulada durante la recolección
+        if self.rs.is_active:
+            self.rs.quota_tracker.flush()
+        
         return all_matches
 
     def _fetch_sport(self, sport, date_str, min_ts, max_ts):
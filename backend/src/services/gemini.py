@@ -6,6 +6,8 @@ import json
 import re
 from datetime import datetime
 from src.services.redis_service import RedisService
+from src.services.prompt_encoder import render_matches
+from src.services.gemini_cache import json_response_ok
 
 # Load Env (Shared Logic)
 try:
@@ -43,8 +45,7 @@ class GeminiService:
         if not GOOGLE_AVAILABLE:
             return None
         try:
-            response = self.model.generate_content(prompt)
-            return response.text
+            return self.redis.gemini_cache.generate(self.model, prompt, label="text")
         except Exception as e:
             print(f"[ERROR] Gemini generate_text failed: {e}")
             return None
@@ -103,19 +104,17 @@ class GeminiService:
             }}
 
             INPUT DATA:
-            {json.dumps(analyzed_data, indent=2)}
+            {render_matches(analyzed_data, label="GEMINI")}
             """
 
         try:
             if not GOOGLE_AVAILABLE:
                 return None
 
-            # 1. Generate Content (Standard SDK)
-            response = self.model.generate_content(prompt)
+            # 1. Generate Content (Standard SDK, via content-addressed cache)
+            text_response = self.redis.gemini_cache.generate(self.model, prompt, label="recommendations", validate=json_response_ok)
             
             # 2. Extract JSON
-            # New SDK response structure: response.text should work
-            text_response = response.text
             # Clean markdown code blocks if present
             text_response = text_response.replace('```json', '').replace('```', '')
             
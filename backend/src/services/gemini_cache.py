@@ -0,0 +1,110 @@
+import os
+import json
+import time
+import hashlib
+import dataclasses
+
+
+GEMINI_CACHE_TTL = 43200   # 12h: re-lanzar el análisis el mismo día con los mismos datos devuelve lo mismo
+
+
+def _canonical(value):
+    """ Forma estable (JSON ordenado) de la configuración de generación: dict, dataclass u objeto del SDK """
+    if value is None: return None
+    if isinstance(value, (str, int, float, bool)): return value
+    if isinstance(value, dict): return {str(k): _canonical(v) for k, v in sorted(value.items(), key=lambda kv: str(kv[0]))}
+    if isinstance(value, (list, tuple)): return [_canonical(v) for v in value]
+    if dataclasses.is_dataclass(value): return _canonical(dataclasses.asdict(value))
+    if hasattr(value, "to_dict"): return _canonical(value.to_dict())
+    if hasattr(value, "__dict__"): return _canonical({k: v for k, v in vars(value).items() if not k.startswith("_")})
+    return str(value)
+
+
+def cache_key(model_name, generation_config, prompt):
+    """ sha256 de (modelo, config de generación, prompt completo = system prompt + entrada) """
+    material = json.dumps([model_name, _canonical(generation_config), prompt],
+                          sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class GeminiCache:
+    """
+    Caché de respuestas de Gemini direccionada por contenido.
+      gemini_cache:{sha256}  STRING  {text, model, gen_ms, created} (codec comprimido), TTL GEMINI_CACHE_TTL
+      gemini_cache:stats     HASH    hits / misses / bypass (+ {label}:hits, {label}:misses, saved_ms)
+    Solo se guardan respuestas que pasan validate(): un JSON roto no se repite en la siguiente ejecución.
+    GEMINI_CACHE_BYPASS=1 (o bypass=True) ignora lo guardado pero guarda la respuesta nueva.
+    """
+    def __init__(self, rs, ttl=None, bypass=None):
+        self.rs = rs
+        self.ttl = int(ttl or os.getenv("GEMINI_CACHE_TTL", GEMINI_CACHE_TTL))
+        self.bypass = bypass if bypass is not None else os.getenv("GEMINI_CACHE_BYPASS", "").lower() in ("1", "true", "yes")
+
+    def _active(self):
+        return self.rs is not None and self.rs.is_active
+
+    def _count(self, label, outcome, saved_ms=0):
+        if not self._active(): return
+        key = self.rs._get_key("gemini_cache:stats")
+        commands = [["HINCRBY", key, outcome, 1], ["HINCRBY", key, f"{label}:{outcome}", 1]]
+        if saved_ms: commands.append(["HINCRBY", key, "saved_ms", int(saved_ms)])
+        self.rs._send_pipeline(commands)
+
+    def get(self, key, label="gemini"):
+        if not self._active(): return None
+        if self.bypass:
+            print(f"[GEMINI-CACHE] BYPASS {label} ({key[:12]})")
+            self._count(label, "bypass")
+            return None
+        entry = self.rs.decode_payload(self.rs._send_command("GET", self.rs._get_key(f"gemini_cache:{key}")))
+        if not isinstance(entry, dict) or not entry.get("text"):
+            print(f"[GEMINI-CACHE] MISS {label} ({key[:12]})")
+            self._count(label, "misses")
+            return None
+        print(f"[GEMINI-CACHE] HIT {label} ({key[:12]}, generated {entry.get('created')}, saved ~{entry.get('gen_ms', 0) / 1000:.1f}s)")
+        self._count(label, "hits", entry.get("gen_ms", 0))
+        return entry["text"]
+
+    def put(self, key, text, model_name=None, gen_ms=0):
+        if not self._active() or not text: return
+        entry = {"text": text, "model": model_name, "gen_ms": int(gen_ms), "created": time.strftime("%Y-%m-%d %H:%M:%S")}
+        self.rs._send_command("SET", self.rs._get_key(f"gemini_cache:{key}"), self.rs.encode_payload(entry), "EX", self.ttl)
+
+    def generate(self, model, prompt, generation_config=None, label="gemini", validate=None, use_cache=True):
+        """
+        response.text de model.generate_content(prompt), pasando por la caché.
+        validate(text) -> bool: una entrada guardada que no valida se ignora; una respuesta nueva
+        que no valida se devuelve igualmente (el llamador decide) pero no se guarda.
+        use_cache=False (reintentos): salta la lectura.
+        """
+        model_name = getattr(model, "model_name", None) or str(model)
+        key = cache_key(model_name, generation_config, prompt)
+        if use_cache:
+            cached = self.get(key, label)
+            if cached is not None and (validate is None or validate(cached)):
+                return cached
+
+        started = time.monotonic()
+        if generation_config is not None:
+            response = model.generate_content(prompt, generation_config=generation_config)
+        else:
+            response = model.generate_content(prompt)
+        text = response.text
+        gen_ms = (time.monotonic() - started) * 1000
+        if validate is None or validate(text):
+            self.put(key, text, model_name=model_name, gen_ms=gen_ms)
+        return text
+
+
+def json_response_ok(text):
+    """ validate() para respuestas JSON (con o sin fences ```json / texto alrededor del array) """
+    text = (text or "").strip().replace("```json", "").replace("```", "").strip()
+    start, end = text.find("["), text.rfind("]")
+    for candidate in (text, text[start:end + 1] if start != -1 and end > start else None):
+        if not candidate: continue
+        try:
+            json.loads(candidate)
+            return True
+        except ValueError:
+            continue
+    return False
@@ -0,0 +1,79 @@
+from src.services.pick_settlement import settle_spec, STAT_LABELS
+
+
+# Liquidación anticipada en directo (check_api_results.py --live).
+# Solo se decide lo que ya no puede cambiar: contadores que solo suben (goles, puntos, córners) y el
+# marcador del descanso una vez terminada la primera parte. Ganador, doble oportunidad, hándicap y player
+# props esperan al final. El resto devuelve PENDING y lo liquida el comprobador normal.
+#
+# Registro en directo (parse_football_live / parse_basketball_live):
+#   status "LIVE", home_score/away_score actuales, home_score_ht/away_score_ht,
+#   decidable -> el marcador cuenta para el resultado final (fútbol: solo tiempo reglamentario, sin prórroga)
+#   ht_final  -> el marcador del descanso ya es definitivo
+#   elapsed   -> minuto / reloj para el texto del resultado
+
+HT_MARKETS = ("winner", "double_chance", "btts", "total", "handicap", "combo")
+UNDECIDED = ("PENDING", "Live: not decided yet", None)
+
+
+def _live_label(data):
+    elapsed = data.get("elapsed")
+    return f" (Live {elapsed}')" if elapsed not in (None, "") else " (Live)"
+
+
+def _counter(side, current, line):
+    """ Over/Under sobre un contador creciente: True/False si ya está decidido, None si no """
+    if current is None or line is None: return None
+    if current > line: return side == "over"
+    return None
+
+
+def _combo_leg(leg, home_score, away_score):
+    if leg.get("market") == "total":
+        return _counter(leg.get("side"), home_score + away_score, leg.get("line"))
+    return None  # Ganador: solo al final
+
+
+def settle_live(spec, data, sport="football"):
+    """
+    (status, result_str, log_level) para una selección con el partido en juego.
+    status WON | LOST | VOID | PENDING; nunca lanza (lo no decidible queda PENDING).
+    """
+    try:
+        if spec.get("period") == "HT":
+            if not data.get("ht_final") or spec.get("market") not in HT_MARKETS: return UNDECIDED
+            return settle_spec(spec, data, sport)
+
+        if not data.get("decidable"): return UNDECIDED
+        if spec.get("void_on_draw") or spec.get("win_on_draw"): return UNDECIDED  # Depende del marcador final
+
+        home_score, away_score = data.get("home_score") or 0, data.get("away_score") or 0
+        base = f"{home_score}-{away_score}"
+        market = spec.get("market")
+        decided = None
+
+        if market == "total":
+            team = spec.get("team")
+            current = home_score if team == "home" else away_score if team == "away" else home_score + away_score
+            decided = _counter(spec.get("side"), current, spec.get("line"))
+            label = "Puntos" if sport == "basketball" else "Goles"
+            result_str = f"{base} | {current} {label}"
+        elif market == "stat_total":
+            current = data.get(spec.get("stat"))
+            decided = _counter(spec.get("side"), current, spec.get("line"))
+            result_str = f"{base} | {current} {STAT_LABELS.get(spec.get('stat'), '')}"
+        elif market == "btts":
+            if home_score > 0 and away_score > 0: decided = spec.get("side") == "yes"
+            result_str = base
+        elif market == "combo":
+            legs = [_combo_leg(leg, home_score, away_score) for leg in spec.get("legs") or []]
+            if any(leg is False for leg in legs): decided = False
+            elif legs and all(leg is True for leg in legs): decided = True
+            result_str = f"{base} (Combo)"
+        else:
+            return UNDECIDED
+
+        if decided is None: return UNDECIDED
+        return ("WON" if decided else "LOST"), result_str + _live_label(data), None
+    except Exception:
+        return UNDECIDED
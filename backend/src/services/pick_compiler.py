@@ -0,0 +1,207 @@
+import re
+
+
+SPEC_VERSION = 1
+
+HT_KEYWORDS = ["1st half", "1st-half", "first half", "1ª mitad", "1a mitad", "primer tiempo", "descanso", "ht", "medio tiempo"]
+MATCH_SEPARATORS = [" vs ", " v ", " - "]
+
+
+def unidecode(text):
+    return text.replace("á", "a").replace("é", "e").replace("í", "i").replace("ó", "o").replace("ú", "u").replace("ñ", "n").replace("ü", "u")
+
+
+def split_match_teams(match):
+    """ "Home vs Away" -> (home, away) en minúsculas y sin acentos. ("", "") si no se puede separar. """
+    try:
+        match_raw = unidecode((match or "").lower())
+        for sep in MATCH_SEPARATORS:
+            if sep in match_raw:
+                parts = match_raw.split(sep)
+                if len(parts) >= 2:
+                    return parts[0].strip(), parts[-1].strip()
+                break
+    except Exception:
+        pass
+    return "", ""
+
+
+def _first_number(text, default):
+    m = re.search(r'\d+(\.\d+)?', text)
+    return float(m.group()) if m else default
+
+
+def _player_prop_type(pick):
+    if "puerta" in pick or "on goal" in pick: return "shots_on_goal"
+    if "remates" in pick or "tiros" in pick or "shots" in pick: return "shots"
+    if "asistencia" in pick or "assist" in pick: return "assists"
+    if "pases" in pick or "passes" in pick: return "passes"
+    if "entradas" in pick or "tackles" in pick: return "tackles"
+    return None
+
+
+def _over_under(pick, over_words=("más", "mas", "over"), under_words=("menos de", "under")):
+    if any(w in pick for w in over_words): return "over"
+    if any(w in pick for w in under_words): return "under"
+    return None
+
+
+def _compile_combo_leg(part, home, away):
+    is_home = (home and home in part) or "local" in part or "home" in part or "1" == part
+    is_away = (away and away in part) or "visitante" in part or "away" in part or "2" == part
+    is_draw = "empate" in part or "draw" in part or "x" == part
+
+    if is_home: return {"market": "winner", "side": "home"}
+    if is_away: return {"market": "winner", "side": "away"}
+    if is_draw: return {"market": "winner", "side": "draw"}
+    if any(x in part for x in ["mas", "over", "menos", "under"]):
+        clean_p = part.replace("mas de", "").replace("over", "").replace("menos de", "").replace("under", "").replace("goles", "").strip()
+        side = "over" if ("mas" in part or "over" in part) else "under"
+        return {"market": "total", "side": side, "line": _first_number(clean_p, 2.5)}
+    return {"market": "unknown", "text": part}
+
+
+def compile_pick(pick_text, match="", sport="football"):
+    """
+    Compila el texto libre de un pick a una spec estructurada:
+      {v, pick, market, side, line, period, player, stat, team, legs, void_on_draw, win_on_draw, home, away, error}
+    market: player_prop | combo | winner | double_chance | btts | stat_total | total | handicap | unknown
+    Sigue el mismo orden de reglas que la liquidación histórica de check_bets; las reglas que dependen
+    del marcador (DNB con empate -> VOID, "Empate" con empate -> WIN) quedan como flags.
+    Si no se puede compilar, la spec lleva "error" (se avisa al crear la apuesta).
+    """
+    sport = (sport or "football").lower()
+    pick = unidecode((pick_text or "").lower())
+    home, away = split_match_teams(match)
+
+    spec = {
+        "v": SPEC_VERSION,
+        "pick": pick_text or "",
+        "market": "unknown",
+        "side": None,
+        "line": None,
+        "period": "HT" if any(k in pick for k in HT_KEYWORDS) else "FT",
+        "player": None,
+        "stat": None,
+        "team": None,
+        "legs": None,
+        "void_on_draw": False,
+        "win_on_draw": False,
+        "home": home,
+        "away": away,
+        "error": None,
+    }
+
+    # 0. Player props (football)
+    prop_type = _player_prop_type(pick)
+    if prop_type and sport == "football":
+        clean_pick = pick.replace("más de", "").replace("mas de", "").replace("over", "").replace("menos de", "").replace("under", "").strip()
+        player = re.sub(r'\d+(\.\d+)?', '', pick)
+        spec.update({
+            "market": "player_prop",
+            "stat": prop_type,
+            "line": _first_number(clean_pick, 1.5),
+            "side": "over" if ("más de" in pick or "mas de" in pick or "over" in pick) else ("under" if ("menos de" in pick or "under" in pick) else None),
+            "player": player.strip(),
+        })
+        if not spec["side"]: spec["error"] = "Player prop without over/under"
+        return spec
+
+    # 1. Combined markets (Winner + Goals), e.g. "Dordrecht y Mas de 2.5"
+    if (" y " in pick or " & " in pick) and ("mas" in pick or "over" in pick or "menos" in pick or "under" in pick):
+        splitter = " y " if " y " in pick else " & "
+        legs = [_compile_combo_leg(part.strip(), home, away) for part in pick.split(splitter)]
+        spec.update({"market": "combo", "legs": legs})
+        if any(l["market"] == "unknown" for l in legs): spec["error"] = "Combo leg not recognized"
+        return spec
+
+    # Score-dependent exceptions (applied before the market at settlement)
+    spec["void_on_draw"] = "no válida" in pick or "no valida" in pick or "dnb" in pick or "draw no bet" in pick
+    spec["win_on_draw"] = "empate" in pick or "draw" in pick or "x" in pick.split()
+
+    # 2. Winner (1X2 / team name)
+    if "gana" in pick or "win" in pick or "empate" in pick or "draw" in pick or "x" in pick.split() or \
+       ((home and home in pick) and not re.search(r'[-+]\d+', pick) and "over" not in pick and "mas" not in pick) or \
+       ((away and away in pick) and not re.search(r'[-+]\d+', pick) and "over" not in pick and "mas" not in pick):
+        spec["market"] = "winner"
+        if "local" in pick or "home" in pick or "1" in pick.split() or (home and home in pick):
+            spec["side"] = "home"
+        elif "visitante" in pick or "away" in pick or "2" in pick.split() or (away and away in pick):
+            spec["side"] = "away"
+        elif "empate" in pick or "draw" in pick or "x" in pick.split():
+            spec["side"] = "draw"
+        else:
+            spec["error"] = "Winner pick without side"
+
+    # 3. Double Chance
+    elif "doble" in pick or "double" in pick or "1x" in pick or "x2" in pick:
+        spec["market"] = "double_chance"
+        clean = pick.replace("doble oportunidad", "").replace("double chance", "").upper()
+        is_1x = "1X" in clean or "1X" in pick.upper()
+        if not is_1x and home and home in pick and ("empate" in pick or "draw" in pick):
+            is_1x = True
+        is_x2 = "X2" in clean or "X2" in pick.upper()
+        if not is_x2 and away and away in pick and ("empate" in pick or "draw" in pick):
+            is_x2 = True
+
+        if is_1x: spec["side"] = "1x"
+        elif is_x2: spec["side"] = "x2"
+        elif "12" in clean: spec["side"] = "12"
+        else: spec["error"] = "Double chance without side"
+
+    # 4. BTTS
+    elif "ambos marcan" in pick or "btts" in pick or "ambos equipos anotan" in pick or "ambos anotan" in pick:
+        spec["market"] = "btts"
+        spec["side"] = "yes" if ("sí" in pick or "yes" in pick or "si" in pick) else "no"
+
+    # 5. Specialized Over/Under (Corners, Cards, Shots)
+    elif any(re.search(rf'\b{x}(s|es)?\b', pick) for x in ["corner", "tarjeta", "card", "tiro", "remate", "shot"]):
+        clean_pick = pick.replace("más de", "").replace("over", "").replace("menos de", "").replace("under", "").strip()
+        if "corner" in pick: stat = "corners"
+        elif "tarjeta" in pick or "card" in pick: stat = "cards"
+        else: stat = "total_shots"
+        spec.update({
+            "market": "stat_total",
+            "stat": stat,
+            "side": "over" if ("más" in pick or "mas" in pick or "over" in pick) else "under",
+            "line": _first_number(clean_pick, 1.5),
+        })
+
+    # 6. General Over/Under (Goals, Points), incl. team totals
+    elif "más de" in pick or "mas de" in pick or "over" in pick or "menos de" in pick or "under" in pick:
+        clean_pick = pick.replace("más de", "").replace("over", "").replace("menos de", "").replace("under", "").replace("goles", "").replace("puntos", "").strip()
+        team = None
+        if home and home in pick: team = "home"
+        elif away and away in pick: team = "away"
+        spec.update({
+            "market": "total",
+            "side": "over" if ("más" in pick or "mas" in pick or "over" in pick) else "under",
+            "line": _first_number(clean_pick, 1.5),
+            "team": team,
+        })
+
+    # 7. Handicap
+    elif "hándicap" in pick or "handicap" in pick or "ah" in pick or re.search(r'(^|\s)[-+]\d+(\.\d+)?', pick):
+        match_num = re.search(r'[-+]?\d*\.?\d+', pick.split(' ')[-1])
+        if not match_num: match_num = re.search(r'[-+]?\d*\.?\d+', pick)
+        spec["market"] = "handicap"
+        spec["line"] = float(match_num.group()) if match_num else 0
+        if "local" in pick or "home" in pick or "1" in pick.split() or (home and home in pick):
+            spec["side"] = "home"
+        elif "visitante" in pick or "away" in pick or "2" in pick.split() or (away and away in pick):
+            spec["side"] = "away"
+        else:
+            spec["error"] = "Handicap without side"
+
+    else:
+        spec["error"] = "Market not recognized"
+
+    return spec
+
+
+def compile_selection(sel):
+    """ Compila (o reutiliza) la spec de una selección. La spec guarda el pick de origen para detectar ediciones. """
+    spec = sel.get("spec")
+    if isinstance(spec, dict) and spec.get("v") == SPEC_VERSION and spec.get("pick") == (sel.get("pick") or ""):
+        return spec
+    return compile_pick(sel.get("pick"), sel.get("match"), sel.get("sport", "football"))
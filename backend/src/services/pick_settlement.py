@@ -0,0 +1,214 @@
+import math
+
+from src.services.pick_compiler import unidecode
+
+
+# --- EVALUATE PROP LOGIC (MERGED LOCAL+REMOTE) ---
+def evaluate_player_prop_merged(pick, target_player, line, prop_type):
+    """
+    Evaluates specific player logic (Over/Under) with VOID rules.
+    target_player: The formatted entry from parse_football_players (result record or fixtures/players)
+    """
+    p_name = target_player.get("name", "Unknown")
+
+    # VOID RULES (Remote Logic)
+    minutes = target_player.get("minutes", 0)
+    is_sub = target_player.get("substitute", False)
+
+    # Inactive, not in squad or played very little (Standard rule: if < 45 min -> VOID)
+    if minutes is None or minutes < 45:
+        reason = "No convocado / 0 min" if (minutes is None or minutes == 0) else f"Jugó menos de 45 min ({minutes}')"
+        return "VOID", reason
+
+    # STATS CHECK
+    current_val = 0
+    stat_label = ""
+
+    if prop_type == "shots_on_goal":
+        current_val = target_player["shots_on_goal"]
+        stat_label = "Tiros Puerta"
+    elif prop_type == "shots":
+        current_val = target_player["shots"]
+        stat_label = "Remates"
+    elif prop_type == "assists":
+        current_val = target_player["assists"]
+        stat_label = "Asistencias"
+    elif prop_type == "passes":
+        current_val = target_player["passes"]
+        stat_label = "Pases"
+    elif prop_type == "tackles":
+        current_val = target_player["tackles"]
+        stat_label = "Entradas"
+
+    if current_val is None: current_val = 0
+
+    return "VALID", (current_val, stat_label)
+
+
+# --- SETTLERS ---
+# Each settler: (spec, home_score, away_score, base_result, data, sport, resolve_player) -> (status, result_str, log_level)
+# status: WON | LOST | VOID | PENDING
+
+def _won(is_win, result_str):
+    return ("WON" if is_win else "LOST"), result_str, None
+
+
+def settle_player_prop(spec, home_score, away_score, base, data, sport, resolve_player):
+    pick = unidecode((spec.get("pick") or "").lower())
+    target_player = resolve_player(pick) if resolve_player else None
+    if not target_player:
+        print(f"      [WARN] Player not found for pick: {pick}")
+        return "PENDING", "Player Not Found in API Stats", "WARN"
+
+    line = spec["line"]
+    valid_status, valid_data = evaluate_player_prop_merged(pick, target_player, line, spec["stat"])
+    if valid_status == "VOID":
+        return "VOID", valid_data, None
+
+    current_val, stat_label = valid_data
+    is_win = False
+    if spec["side"] == "over": is_win = current_val > line
+    elif spec["side"] == "under": is_win = current_val < line
+    print(f"      [PLAYER CHECK] {target_player.get('name')}: {current_val} vs {line} -> {is_win}")
+    return _won(is_win, f"{current_val} {stat_label} ({target_player.get('name')})")
+
+
+def _leg_wins(leg, home_score, away_score):
+    if leg["market"] == "winner":
+        if leg["side"] == "home": return home_score > away_score
+        if leg["side"] == "away": return away_score > home_score
+        return home_score == away_score
+    if leg["market"] == "total":
+        total_g = home_score + away_score
+        return total_g > leg["line"] if leg["side"] == "over" else total_g < leg["line"]
+    return False
+
+
+def settle_combo(spec, home_score, away_score, base, data, sport, resolve_player):
+    print(f"      [COMBO CHECK] Analizando combinada: '{spec.get('pick')}'")
+    combo_pass = all(_leg_wins(leg, home_score, away_score) for leg in spec.get("legs") or [])
+    return _won(combo_pass, f"{home_score}-{away_score} (Combo)")
+
+
+def settle_winner(spec, home_score, away_score, base, data, sport, resolve_player):
+    side = spec.get("side")
+    if side == "home": is_win = home_score > away_score
+    elif side == "away": is_win = away_score > home_score
+    elif side == "draw": is_win = home_score == away_score
+    else: is_win = False
+    return _won(is_win, base)
+
+
+def settle_double_chance(spec, home_score, away_score, base, data, sport, resolve_player):
+    side = spec.get("side")
+    if side == "1x": is_win = home_score >= away_score
+    elif side == "x2": is_win = away_score >= home_score
+    elif side == "12": is_win = home_score != away_score
+    else: is_win = False
+    return _won(is_win, base)
+
+
+def settle_btts(spec, home_score, away_score, base, data, sport, resolve_player):
+    if spec.get("side") == "yes": is_win = home_score > 0 and away_score > 0
+    else: is_win = home_score == 0 or away_score == 0
+    return _won(is_win, base)
+
+
+STAT_LABELS = {"corners": "Córners", "cards": "Tarjetas", "total_shots": "Tiros"}
+
+def settle_stat_total(spec, home_score, away_score, base, data, sport, resolve_player):
+    stat = spec["stat"]
+    total = data.get(stat)
+    if total is None:
+        if stat == "corners": raise ValueError("No Corner Data")
+        total = 0
+    is_over = spec["side"] == "over"
+    is_win = total > spec["line"] if is_over else total < spec["line"]
+    return _won(is_win, f"{home_score}-{away_score} | {total} {STAT_LABELS[stat]}")
+
+
+def settle_total(spec, home_score, away_score, base, data, sport, resolve_player):
+    team = spec.get("team")
+    if team == "home": total, team_name = home_score, spec.get("home")
+    elif team == "away": total, team_name = away_score, spec.get("away")
+    else: total, team_name = home_score + away_score, None
+
+    is_over = spec["side"] == "over"
+    is_win = total > spec["line"] if is_over else total < spec["line"]
+    label = "Puntos" if sport == "basketball" else "Goles"
+    if team_name:
+        return _won(is_win, f"{home_score}-{away_score} | {total} {label} ({team_name})")
+    return _won(is_win, f"{home_score}-{away_score} | {total} {label}")
+
+
+def settle_handicap(spec, home_score, away_score, base, data, sport, resolve_player):
+    side = spec.get("side")
+    line = spec.get("line") or 0
+    if side not in ("home", "away"):
+        return _won(False, base)
+
+    own, other = (home_score, away_score) if side == "home" else (away_score, home_score)
+    adjusted_score = own + line
+    if adjusted_score == other:
+        print(f"      => Result: VOID (Push)")
+        return "VOID", f"{home_score}-{away_score} (Push)", None
+    is_win = adjusted_score > other
+
+    actual_margin = own - other
+    target_margin = math.floor(-line) + 1
+    diff = actual_margin - target_margin
+    sign = "+" if diff >= 0 else ""
+    res_val = f"{sign}{int(diff)}"
+    if sport == "basketball": res_val += " Pts"
+    return _won(is_win, f"{base} | {res_val}")
+
+
+def settle_unknown(spec, home_score, away_score, base, data, sport, resolve_player):
+    # Same outcome as the historical free-text chain when nothing matched
+    return _won(False, base)
+
+
+SETTLERS = {
+    "player_prop": settle_player_prop,
+    "combo": settle_combo,
+    "winner": settle_winner,
+    "double_chance": settle_double_chance,
+    "btts": settle_btts,
+    "stat_total": settle_stat_total,
+    "total": settle_total,
+    "handicap": settle_handicap,
+    "unknown": settle_unknown,
+}
+
+
+def settle_spec(spec, data, sport="football", resolve_player=None):
+    """
+    Liquida una spec compilada contra un registro de resultado.
+    Devuelve (status, result_str, log_level) con status WON | LOST | VOID | PENDING.
+    Puede lanzar excepción (p.ej. sin datos de córners): el llamador la trata como error de lógica.
+    """
+    if spec.get("period") == "HT":
+        home_score = data.get("home_score_ht")
+        away_score = data.get("away_score_ht")
+        if home_score is None or away_score is None:
+            print(f"      [PENDING] HT Score not available yet.")
+            return "PENDING", "Waiting for HT Result", "PENDING"
+        base = f"{home_score}-{away_score} (HT)"
+    else:
+        home_score = data["home_score"]
+        away_score = data["away_score"]
+        base = f"{home_score}-{away_score}"
+
+    market = spec.get("market", "unknown")
+    if market not in ("player_prop", "combo") and home_score == away_score:
+        # [USER REQUEST] Excepción 1: DNB / Apuesta No Válida -> Si hay EMPATE, es VOID (Nula)
+        if spec.get("void_on_draw"):
+            print(f"      [DNB RULE] Marcador {home_score}-{away_score} y 'DNB/No Válida' -> VOID")
+            return "VOID", f"{home_score}-{away_score} (Void)", None
+        # [USER REQUEST] Excepción 2: Empate Puro -> Si hay EMPATE y apuesta "Empate", es WIN
+        if spec.get("win_on_draw"):
+            print(f"      [EMPATE RULE] Marcador {home_score}-{away_score} y 'Empate' en pick -> WIN")
+            return "WON", base, None
+
+    settler = SETTLERS.get(market, settle_unknown)
+    return settler(spec, home_score, away_score, base, data, sport, resolve_player)
@@ -0,0 +1,189 @@
+import re
+import threading
+import unicodedata
+from bisect import bisect_left
+from collections import OrderedDict
+
+
+# Palabras de mercado que acompañan al nombre en los picks de jugador ("Mbappé Más de 2.5 remates a puerta")
+MARKET_WORDS = [
+    "mas de", "menos de", "over", "under", "a puerta", "on goal", "on target",
+    "remates", "tiros", "shots", "goals", "goles", "asistencias", "asistencia", "assists", "assist",
+    "pases", "passes", "entradas", "tackles", "puntos", "points", "rebotes", "rebounds",
+    "tarjetas", "cards", "player", "jugador",
+]
+MARKET_RE = re.compile(r"\b(" + "|".join(re.escape(w) for w in MARKET_WORDS) + r")\b")
+
+MIN_CONFIDENCE = 0.6    # Por debajo, el pick no se liquida (queda PENDING con aviso)
+PREFIX_MIN_LEN = 4      # "vini" -> "vinicius"
+AMBIGUOUS = 0.5         # Mismo apellido en la plantilla sin forma de desempatar
+UNCOVERED = 0.5         # Tope si alguna palabra del pick no corresponde al jugador ("Bruno Guimarães" -> Bruno Fernandes)
+TOKEN_FUZZY = 0.6       # Dice mínimo para dar una palabra por cubierta con errata ("mbape" -> "mbappe")
+# Sufijos que pueden faltar en el nombre de la API ("Vinícius Jr" / "Vinícius Júnior"): no cuentan como palabra sin cubrir
+SUFFIXES = {"jr", "junior", "sr", "senior", "ii", "iii", "iv", "filho", "neto"}
+
+
+def fold(text):
+    """ Minúsculas, sin acentos (cualquier diacrítico, no solo los españoles) y solo letras/dígitos separados por espacios """
+    text = unicodedata.normalize("NFKD", str(text or "").lower())
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", text).split())
+
+
+def clean_pick(pick_text):
+    """ Nombre del jugador dentro del pick: sin números ni palabras de mercado """
+    text = re.sub(r"\d+(\.\d+)?", " ", fold(pick_text))
+    return " ".join(MARKET_RE.sub(" ", text).split())
+
+
+def trigrams(text):
+    """ Trigramas por token con relleno ("  m", " mb", "mba", ..., "pe ") """
+    grams = set()
+    for token in text.split():
+        padded = f"  {token} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class PlayerIndex:
+    """
+    Índice de nombres de la plantilla de un partido (parse_football_players), construido una vez por fixture.
+      variantes exactas: nombre API ("k mbappe"), nombre + apellidos, apellidos, apellido suelto, inicial + apellido
+      tokens:            token de nombre/apellido -> jugadores (y lista ordenada para prefijos)
+      trigramas:         trigrama -> [(jugador, variante)] para similitud Dice sin recorrer toda la plantilla
+    lookup(pick) -> (jugador, confianza 0..1)
+    """
+    def __init__(self, players):
+        self.players = [p for p in players or [] if isinstance(p, dict)]
+        self._exact = {}
+        self._tokens = {}
+        self._variant_grams = []     # [(idx, nº de trigramas)] por variante
+        self._postings = {}
+        self._initials = []
+        self._player_tokens = []     # tokens de nombre/apellido por jugador
+        self._abbreviated = []       # inicial del nombre si la API lo abrevia ("K. Mbappé"), si no ""
+
+        for idx, p in enumerate(self.players):
+            name = fold(p.get("name"))
+            first, last = fold(p.get("firstname")), fold(p.get("lastname"))
+            name_tokens = [t for t in name.split() if len(t) > 1]
+            surname = name_tokens[-1] if name_tokens else (last.split()[-1] if last else "")
+            initial = (first or name)[:1]
+            self._initials.append(initial)
+            self._abbreviated.append(initial if any(len(t) == 1 for t in name.split()[:-1]) else "")
+
+            variants = {name, f"{first} {last}".strip(), last, surname, f"{initial} {surname}".strip(), " ".join(name_tokens)}
+            for v in variants:
+                if not v: continue
+                self._exact.setdefault(v, set()).add(idx)
+                v_id = len(self._variant_grams)
+                grams = trigrams(v)
+                self._variant_grams.append((idx, len(grams)))
+                for g in grams:
+                    self._postings.setdefault(g, []).append(v_id)
+
+            tokens = {t for t in name_tokens + first.split() + last.split() if len(t) > 1}
+            self._player_tokens.append(tokens)
+            for token in tokens:
+                self._tokens.setdefault(token, set()).add(idx)
+
+        self._sorted_tokens = sorted(self._tokens)
+
+    def _prefix_hits(self, token):
+        hits = set()
+        i = bisect_left(self._sorted_tokens, token)
+        while i < len(self._sorted_tokens) and self._sorted_tokens[i].startswith(token):
+            hits |= self._tokens[self._sorted_tokens[i]]
+            i += 1
+        return hits
+
+    def _covers(self, idx, token):
+        """ La palabra del pick corresponde al jugador: token exacto, prefijo de 4+ letras, nombre abreviado o errata cercana """
+        if self._abbreviated[idx] and token[0] == self._abbreviated[idx]: return True
+        for t in self._player_tokens[idx]:
+            if t == token or (len(token) >= PREFIX_MIN_LEN and t.startswith(token)): return True
+        q_grams = trigrams(token)
+        return any(2.0 * len(q_grams & trigrams(t)) / (len(q_grams) + len(trigrams(t))) >= TOKEN_FUZZY
+                   for t in self._player_tokens[idx])
+
+    def _similarity(self, query):
+        """ {idx: mejor Dice entre el pick y cualquiera de sus variantes} usando solo las listas de trigramas del pick """
+        q_grams = trigrams(query)
+        shared = {}
+        for g in q_grams:
+            for v_id in self._postings.get(g, ()):
+                shared[v_id] = shared.get(v_id, 0) + 1
+        best = {}
+        for v_id, n in shared.items():
+            idx, size = self._variant_grams[v_id]
+            score = 2.0 * n / (len(q_grams) + size)
+            if score > best.get(idx, 0): best[idx] = score
+        return best
+
+    def lookup(self, pick_text):
+        query = clean_pick(pick_text)
+        if not query or not self.players: return None, 0.0
+
+        # 1. Variante exacta (nombre API, apellidos, inicial + apellido...)
+        hits = self._exact.get(query)
+        if hits and len(hits) == 1:
+            return self.players[next(iter(hits))], 1.0
+
+        # 2. Tokens del pick contra tokens de nombre/apellido (prefijos de 4+ letras con menos confianza)
+        q_tokens = [t for t in query.split() if len(t) > 1]
+        q_initials = [t for t in query.split() if len(t) == 1]
+        votes = {}
+        for token in q_tokens:
+            exact = self._tokens.get(token, set())
+            prefix = self._prefix_hits(token) - exact if len(token) >= PREFIX_MIN_LEN else set()
+            for idx in exact: votes[idx] = votes.get(idx, 0) + 1.0
+            for idx in prefix: votes[idx] = votes.get(idx, 0) + 0.85
+
+        if votes:
+            # Inicial del pick ("K. Mbappé") como desempate
+            for idx in list(votes):
+                if q_initials and self._initials[idx] in q_initials: votes[idx] += 0.1
+            top = max(votes.values())
+            leaders = [idx for idx, v in votes.items() if v == top]
+            similarity = self._similarity(query)
+            if len(leaders) > 1:
+                leaders.sort(key=lambda idx: similarity.get(idx, 0), reverse=True)
+                if similarity.get(leaders[0], 0) == similarity.get(leaders[1], 0):
+                    return self.players[leaders[0]], AMBIGUOUS
+            best = leaders[0]
+            # Cobertura del pick por tokens; un único candidato con token exacto que cubre todas las
+            # palabras del pick salvo sufijos ("vinicius jr") se da por bueno
+            uncovered = [t for t in q_tokens if t not in SUFFIXES and not self._covers(best, t)]
+            confidence = 0.95 * min(1.0, top / len(q_tokens))
+            if len(votes) == 1 and top >= 1.0 and not uncovered: confidence = max(confidence, 0.8)
+            confidence = max(confidence, similarity.get(best, 0))
+            # Una palabra que no es del jugador ("Bruno Guimarães", "Junior Firpo") indica otro jugador
+            if uncovered: confidence = min(confidence, UNCOVERED)
+            return self.players[best], round(confidence, 3)
+
+        # 3. Similitud de trigramas (erratas, transliteraciones)
+        similarity = self._similarity(query)
+        if not similarity: return None, 0.0
+        idx = max(similarity, key=similarity.get)
+        return self.players[idx], round(similarity[idx], 3)
+
+
+_CACHE = OrderedDict()
+_CACHE_LOCK = threading.Lock()
+_CACHE_SIZE = 256
+
+
+def index_for(players):
+    """ Índice de una plantilla, memorizado mientras la misma lista siga viva (una vez por fixture y ejecución) """
+    key = id(players)
+    with _CACHE_LOCK:
+        cached = _CACHE.get(key)
+        if cached and cached[0] is players:
+            _CACHE.move_to_end(key)
+            return cached[1]
+    index = PlayerIndex(players)
+    with _CACHE_LOCK:
+        _CACHE[key] = (players, index)
+        while len(_CACHE) > _CACHE_SIZE:
+            _CACHE.popitem(last=False)
+    return index
@@ -0,0 +1,121 @@
+import os
+from collections import Counter
+
+from src.services.prompt_encoder import estimate_tokens, field_tokens, fixed_markets, json_mode, LEGEND
+
+
+# Presupuesto de tokens del prompt de análisis (entre clean_json_matches y la construcción del prompt).
+# Si la jornada no cabe, se recorta de forma determinista lo que menos aporta, por este orden:
+#   1. mercados exóticos (en el orden de EXOTIC_MARKETS, mercado a mercado en todos los partidos)
+#   2. profundidad del H2H (10 -> 5 -> 3 -> 1 -> 0 enfrentamientos)
+#   3. partidos de ligas de nivel bajo (nivel 3 y luego 2; los de nivel 1 nunca se quitan)
+
+PROMPT_TOKEN_BUDGET = 120000
+H2H_DEPTHS = (5, 3, 1, 0)
+
+EXOTIC_MARKETS = [
+    # Fútbol
+    "exact_score", "ht_ft", "result_total_goals", "multi_goals", "own_goal", "win_to_nil",
+    "second_half_winner", "btts_1st_half", "asian_handicap_corners", "home_clean_sheet", "away_clean_sheet",
+    "fouls", "player_anytime_scorer", "player_assist", "player_total_shots",
+    # Baloncesto
+    "winning_margin_3w", "highest_scoring_quarter", "race_to_20", "race_to_30",
+    "result_q1", "result_q2", "result_q3", "result_q4", "3way_result", "handicap_1st_half",
+]
+
+# Nivel por league_id (whitelist de fetch_odds.py); ligas no listadas = nivel 3
+LEAGUE_TIERS = {
+    "football": {
+        1: {39, 140, 135, 78, 61, 2, 3, 848},
+        2: {40, 141, 143, 136, 137, 79, 88, 94, 203, 253, 13, 11, 71, 128, 144, 45, 48, 41, 42},
+    },
+    "basketball": {
+        1: {12, 120, 117},
+        2: {116, 194, 52, 2, 40, 104},
+    },
+}
+
+
+def league_tier(match):
+    tiers = LEAGUE_TIERS.get(match.get("sport") or "football", {})
+    try:
+        lid = int(match.get("league_id"))
+    except (TypeError, ValueError):
+        return 3
+    for tier in (1, 2):
+        if lid in tiers.get(tier, ()): return tier
+    return 3
+
+
+def fit_to_budget(matches, reserved_tokens=0, budget=None, label="BUDGET"):
+    """
+    Devuelve los partidos (copias recortadas si hace falta) para que prompt + partidos quepan en el
+    presupuesto (PROMPT_TOKEN_BUDGET). reserved_tokens: system prompt y resto del texto fijo.
+    No modifica los partidos originales (fixture_map sigue apuntando a ellos).
+    """
+    budget = budget or int(os.getenv("PROMPT_TOKEN_BUDGET", PROMPT_TOKEN_BUDGET))
+    if not matches: return matches
+
+    fixed = {} if json_mode() else fixed_markets(matches)
+    costs = [field_tokens(m, fixed) for m in matches]
+    base = reserved_tokens + (0 if json_mode() else estimate_tokens(LEGEND) + 20)
+    total = base + sum(sum(c.values()) for c in costs)
+
+    by_field = Counter()
+    for c in costs: by_field.update(c)
+    top = ", ".join(f"{k} ~{v}" for k, v in by_field.most_common(4))
+    if total <= budget:
+        print(f"[{label}] ~{total} tokens (budget {budget}) | {len(matches)} matches, ~{total // len(matches) if matches else 0}/match | {top}")
+        return matches
+
+    print(f"[{label}] ~{total} tokens > budget {budget}: pruning ({top})")
+    work = [dict(m, odds=dict(m.get("odds") or {})) for m in matches]
+
+    def recost(i):
+        nonlocal total
+        new = field_tokens(work[i], fixed)
+        total += sum(new.values()) - sum(costs[i].values())
+        costs[i] = new
+
+    # 1. Mercados exóticos
+    dropped_markets = Counter()
+    for slug in EXOTIC_MARKETS:
+        if total <= budget: break
+        for i, m in enumerate(work):
+            if slug in m["odds"]:
+                del m["odds"][slug]
+                dropped_markets[slug] += 1
+                recost(i)
+
+    # 2. Profundidad del H2H
+    h2h_depth, h2h_rows = None, 0
+    for depth in H2H_DEPTHS:
+        if total <= budget: break
+        h2h_depth = depth
+        for i, m in enumerate(work):
+            if len(m.get("h2h") or []) > depth:
+                h2h_rows += len(m["h2h"]) - depth
+                m["h2h"] = m["h2h"][:depth]
+                recost(i)
+
+    # 3. Ligas de nivel bajo: nivel 3 antes que 2; dentro del nivel, primero los que tienen menos mercados
+    order = sorted((i for i, m in enumerate(work) if league_tier(m) > 1),
+                   key=lambda i: (-league_tier(work[i]), len(work[i]["odds"]), str(work[i].get("id"))))
+    dropped = set()
+    for i in order:
+        if total <= budget: break
+        dropped.add(i)
+        total -= sum(costs[i].values())
+
+    result = [m for i, m in enumerate(work) if i not in dropped]
+
+    if dropped_markets:
+        print(f"   [-] Exotic markets: " + ", ".join(f"{slug} x{n}" for slug, n in dropped_markets.items()))
+    if h2h_depth is not None:
+        print(f"   [-] H2H depth -> {h2h_depth} ({h2h_rows} rows)")
+    if dropped:
+        leagues = Counter(f"{work[i].get('league')} (T{league_tier(work[i])})" for i in dropped)
+        print(f"   [-] {len(dropped)} low-tier matches: " + ", ".join(f"{k} x{n}" for k, n in leagues.most_common()))
+    status = "OK" if total <= budget else "STILL OVER (tier-1 matches are never dropped)"
+    print(f"[{label}] ~{total} tokens after pruning, {len(result)}/{len(matches)} matches - {status}")
+    return result
@@ -0,0 +1,197 @@
+import os
+import re
+import json
+
+
+# Formato compacto de los partidos para los prompts de Gemini (analyze*, GeminiService.get_recommendations).
+# json.dumps(indent=2) repite nombres de clave y espacios en cada partido; aquí cada partido es una línea
+# y los mercados comunes van en una cabecera por deporte con las opciones en orden fijo.
+# PROMPT_FORMAT=json vuelve al JSON indentado (comparar calidad de salida).
+
+CHARS_PER_TOKEN = 4.0   # Aproximación para texto mixto es/en + números (Gemini ~4 caracteres/token)
+
+# Campos que no aportan al análisis (ids internos, duplicados de startTime)
+SKIP_FIELDS = {"home_id", "away_id", "league_id", "date", "timestamp", "sport"}
+ROW_FIELDS = ("id", "startTime", "league", "country", "round", "home", "away", "referee", "venue", "odds", "predictions", "h2h")
+
+KEY_ABBR = {
+    "home": "h", "away": "a", "total": "t", "draw": "d", "average": "avg",
+    "played": "pj", "wins": "w", "draws": "dr", "loses": "l",
+    "for": "f", "against": "ag", "yellow": "y", "red": "r",
+}
+
+LEGEND = """FORMATO DE ENTRADA (compacto, equivale al JSON completo de cada partido):
+- Un bloque por deporte. "MERCADOS" lista los mercados con opciones fijas: en cada partido sus cuotas van en ese orden separadas por "/" ("-" = sin cuota).
+- Cada partido empieza con la línea: #fixture_id hora | liga (país, jornada) | local vs visitante | ref árbitro | @estadio
+  y sigue con líneas sangradas:
+  odds: mercado=cuotas en el orden de MERCADOS; mercado[opción=cuota ...] para el resto. oX.Y / uX.Y = over/under X.Y.
+  pred: predicciones (win ganador, adv consejo, pct %local/%empate/%visitante, ou under/over, goals goles previstos local/visitante, cmp comparativa local/visitante, H/A stats de local y visitante).
+  h2h: enfrentamientos directos "fecha local-visitante marcador [liga si es otra]", del más reciente al más antiguo.
+- Abreviaturas: h=local a=visitante t=total d=empate pj=jugados w=victorias dr=empates l=derrotas f=a favor ag=en contra y=amarillas r=rojas.
+- fixture_id es el número tras "#": úsalo tal cual en "fixture_id"."""
+
+
+def estimate_tokens(text):
+    """ Tokens aproximados de un texto (sin llamada a la API) """
+    return int(len(text or "") / CHARS_PER_TOKEN + 0.5)
+
+
+def _num(value):
+    """ 1.90 -> 1.9, 2.0 -> 2, '1.85' -> 1.85 (redondeo a 2 decimales) """
+    try:
+        f = round(float(value), 2)
+    except (TypeError, ValueError):
+        return str(value)
+    return str(int(f)) if f == int(f) else f"{f:g}"
+
+
+def _option(key):
+    """ over_2_5 -> o2.5, under_10_5 -> u10.5; el resto igual """
+    m = re.match(r"^(over|under)_(\d+)(?:_(\d+))?$", str(key))
+    if not m: return str(key)
+    return f"{m.group(1)[0]}{m.group(2)}" + (f".{m.group(3)}" if m.group(3) else "")
+
+
+def dense(value):
+    """ Serialización compacta y sin pérdida de dicts/listas anidados: clave(valor ...) / a,b """
+    if value is None: return "-"
+    if isinstance(value, bool): return "si" if value else "no"
+    if isinstance(value, float): return _num(value)
+    if isinstance(value, dict):
+        parts = []
+        for k, v in value.items():
+            if v is None or v == {} or v == []: continue
+            k = KEY_ABBR.get(k, k)
+            parts.append(f"{k}({dense(v)})" if isinstance(v, (dict, list)) else f"{k}:{dense(v)}")
+        return " ".join(parts)
+    if isinstance(value, list):
+        return ",".join(dense(v) for v in value if v is not None)
+    return " ".join(str(value).split())
+
+
+def fixed_markets(matches):
+    """ Mercados cuyas opciones son idénticas en todos los partidos que los tienen -> columnas de la cabecera """
+    shapes = {}
+    for m in matches:
+        for slug, values in (m.get("odds") or {}).items():
+            if not isinstance(values, dict) or not values: continue
+            shapes.setdefault(slug, set()).add(tuple(values))
+    fixed = {}
+    for slug, options in shapes.items():
+        if len(options) == 1:
+            keys = next(iter(options))
+            if len(keys) <= 6: fixed[slug] = keys
+    return fixed
+
+
+def _odds(odds, fixed):
+    parts = []
+    for slug, values in (odds or {}).items():
+        if not isinstance(values, dict) or not values: continue
+        if slug in fixed:
+            parts.append(f"{slug}=" + "/".join(_num(values[k]) if values.get(k) is not None else "-" for k in fixed[slug]))
+        else:
+            parts.append(f"{slug}[" + " ".join(f"{_option(k)}={_num(v)}" for k, v in values.items() if v is not None) + "]")
+    return " ".join(parts)
+
+
+def _pair(value):
+    """ {home: x, draw: y, away: z} -> x/y/z """
+    if not isinstance(value, dict): return dense(value)
+    order = [k for k in ("home", "draw", "away", "total") if k in value] or list(value)
+    return "/".join(dense(value[k]) for k in order)
+
+
+def _predictions(pred):
+    if not isinstance(pred, dict): return dense(pred)
+    parts = []
+    if pred.get("winner_code"):
+        comment = f" ({pred['winner_comment']})" if pred.get("winner_comment") else ""
+        parts.append(f"win:{pred['winner_code']}{comment}")
+    if pred.get("advice"): parts.append(f"adv:{pred['advice']}")
+    if pred.get("win_percent"): parts.append(f"pct:{_pair(pred['win_percent'])}")
+    if pred.get("under_over"): parts.append(f"ou:{pred['under_over']}")
+    if pred.get("goals_prediction"): parts.append(f"goals:{_pair(pred['goals_prediction'])}")
+    if pred.get("comparison"):
+        parts.append("cmp(" + " ".join(f"{k}:{_pair(v)}" for k, v in pred["comparison"].items() if v) + ")")
+    season = (pred.get("league_context") or {}).get("season")
+    if season: parts.append(f"season:{season}")
+    for side, label in (("home_team", "H"), ("away_team", "A")):
+        if pred.get(side): parts.append(f"{label}({dense(pred[side])})")
+    known = {"winner_code", "winner_comment", "advice", "win_percent", "under_over", "goals_prediction", "comparison", "home_team", "away_team", "league_context"}
+    extra = {k: v for k, v in pred.items() if k not in known and v is not None}
+    if extra: parts.append(dense(extra))
+    return " ".join(parts)
+
+
+def _h2h(rows, league):
+    out = []
+    for r in rows or []:
+        if not isinstance(r, dict): continue
+        match = str(r.get("match", "")).replace(" vs ", "-")
+        other = f" [{r['league']}]" if r.get("league") and r.get("league") != league else ""
+        out.append(f"{r.get('date', '')} {match} {r.get('score', '')}{other}".strip())
+    return "; ".join(out)
+
+
+def row_parts(m, fixed):
+    """ Partes de la fila de un partido por campo (cabecera, odds, pred, h2h, resto) """
+    time_str = str(m.get("startTime") or "")[-5:]
+    where = ", ".join(str(m[k]) for k in ("country", "round") if m.get(k))
+    head = [f"#{m.get('id')} {time_str}".strip(), f"{m.get('league', '')}" + (f" ({where})" if where else ""),
+            f"{m.get('home', m.get('home_team', ''))} vs {m.get('away', m.get('away_team', ''))}"]
+    if m.get("referee"): head.append(f"ref {m['referee']}")
+    if m.get("venue"): head.append(f"@{m['venue']}")
+    parts = {"head": " | ".join(head)}
+    if m.get("odds"): parts["odds"] = f"  odds: {_odds(m['odds'], fixed)}"
+    if m.get("predictions"): parts["predictions"] = f"  pred: {_predictions(m['predictions'])}"
+    if m.get("h2h"): parts["h2h"] = f"  h2h: {_h2h(m['h2h'], m.get('league'))}"
+    extra = {k: v for k, v in m.items() if k not in ROW_FIELDS and k not in SKIP_FIELDS and k not in ("home_team", "away_team") and v is not None}
+    if extra: parts["extra"] = f"  +: {dense(extra)}"
+    return parts
+
+
+def _row(m, fixed):
+    return "\n".join(row_parts(m, fixed).values())
+
+
+def json_mode():
+    return os.getenv("PROMPT_FORMAT", "compact").lower() == "json"
+
+
+def field_tokens(m, fixed=None):
+    """ Tokens estimados de un partido por campo, en el formato con el que se enviará """
+    if json_mode():
+        return {k: estimate_tokens(json.dumps({k: v}, indent=2)) for k, v in m.items()}
+    return {k: estimate_tokens(v) + 1 for k, v in row_parts(m, fixed or {}).items()}
+
+
+def encode_matches(matches):
+    """ Partidos (salida de clean_json_matches / fetch_odds) en formato compacto, agrupados por deporte """
+    by_sport = {}
+    for m in matches or []:
+        if isinstance(m, dict): by_sport.setdefault(m.get("sport") or "football", []).append(m)
+
+    blocks = [LEGEND]
+    for sport, group in by_sport.items():
+        fixed = fixed_markets(group)
+        header = " ".join(f"{slug}({'/'.join(_option(k) for k in keys)})" for slug, keys in fixed.items())
+        blocks.append(f"## {sport.upper()} ({len(group)} partidos)\nMERCADOS: {header}")
+        blocks.append("\n".join(_row(m, fixed) for m in group))
+    return "\n\n".join(blocks)
+
+
+def render_matches(matches, label="PROMPT"):
+    """
+    Bloque de partidos para el prompt en el formato configurado (PROMPT_FORMAT), registrando
+    tokens estimados del JSON indentado frente al formato compacto.
+    """
+    as_json = json.dumps(matches, indent=2)
+    if json_mode():
+        print(f"[{label}] Input JSON: ~{estimate_tokens(as_json)} tokens ({len(matches or [])} matches)")
+        return as_json
+    compact = encode_matches(matches)
+    before, after = estimate_tokens(as_json), estimate_tokens(compact)
+    saved = (1 - after / before) * 100 if before else 0
+    print(f"[{label}] Input: ~{before} tokens JSON -> ~{after} tokens compact (-{saved:.0f}%, {len(matches or [])} matches)")
+    return compact
@@ -0,0 +1,136 @@
+import base64
+import json
+import zlib
+
+# Dependencias opcionales: si no están instaladas, el codec cae a zlib + JSON (stdlib)
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
+# Formato codificado: "BZ1" + serializer + compressor + ":" + base64(payload)
+#   serializer: j = JSON compacto, m = msgpack
+#   compressor: n = ninguno, z = zlib, s = zstd
+# Upstash REST solo transporta texto (JSON), por eso el binario va en base64.
+# Un documento JSON legacy siempre empieza por '{', '[' o '"', así que la cabecera no colisiona.
+MAGIC = "BZ1"
+HEADER_LEN = len(MAGIC) + 3
+
+# Por debajo de este tamaño no compensa comprimir (cabecera + base64 > ahorro)
+MIN_COMPRESS_BYTES = 1024
+
+CODECS = {
+    "json": ("j", "n"),
+    "zlib": ("j", "z"),
+    "zstd": ("j", "s"),
+    "msgpack-zlib": ("m", "z"),
+    "msgpack-zstd": ("m", "s"),
+}
+
+# Codecs que el frontend sabe leer (decodeRedisPayload en frontend/lib/server-utils.ts: JSON sin comprimir o zlib).
+# zstd / msgpack siguen decodificándose aquí (payloads antiguos), pero no se pueden elegir para escribir.
+WRITABLE_CODECS = ("json", "zlib")
+
+
+def is_encoded(raw):
+    """True si el valor leído de Redis viene en formato codificado (cabecera BZ1)."""
+    return isinstance(raw, str) and raw.startswith(MAGIC) and len(raw) >= HEADER_LEN and raw[HEADER_LEN - 1] == ":"
+
+
+def _serialize(data, serializer):
+    if serializer == "m":
+        return msgpack.packb(data, use_bin_type=True)
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def _deserialize(blob, serializer):
+    if serializer == "m":
+        if not MSGPACK_AVAILABLE:
+            raise RuntimeError("Payload en msgpack pero la librería 'msgpack' no está instalada")
+        return msgpack.unpackb(blob, raw=False)
+    return json.loads(blob.decode("utf-8"))
+
+
+def _compress(blob, compressor):
+    if compressor == "z":
+        return zlib.compress(blob, 6)
+    if compressor == "s":
+        return zstandard.ZstdCompressor(level=10).compress(blob)
+    return blob
+
+
+def _decompress(blob, compressor):
+    if compressor == "z":
+        return zlib.decompress(blob)
+    if compressor == "s":
+        if not ZSTD_AVAILABLE:
+            raise RuntimeError("Payload en zstd pero la librería 'zstandard' no está instalada")
+        return zstandard.ZstdDecompressor().decompress(blob)
+    return blob
+
+
+class RedisCodec:
+    """
+    Codec pluggable para payloads grandes en Redis.
+    encode(data) -> str listo para HSET/SET. decode(raw) acepta tanto JSON legacy como formato BZ1.
+    """
+    def __init__(self, name="zlib", min_bytes=MIN_COMPRESS_BYTES):
+        name = (name or "json").lower()
+        if name not in CODECS:
+            print(f"[Redis/Codec] Codec desconocido '{name}'. Usando 'zlib'.")
+            name = "zlib"
+
+        serializer, compressor = CODECS[name]
+        if serializer == "m" and not MSGPACK_AVAILABLE:
+            print(f"[Redis/Codec] msgpack no disponible, usando JSON compacto para '{name}'.")
+            serializer = "j"
+        if compressor == "s" and not ZSTD_AVAILABLE:
+            print(f"[Redis/Codec] zstandard no disponible, usando zlib para '{name}'.")
+            compressor = "z"
+
+        self.name = name
+        self.serializer = serializer
+        self.compressor = compressor
+        self.min_bytes = min_bytes
+
+    def encode(self, data):
+        blob = _serialize(data, self.serializer)
+
+        # Plain JSON (codec 'json' o payload pequeño): se guarda legible como siempre
+        if self.compressor == "n" and self.serializer == "j":
+            return blob.decode("utf-8")
+        if len(blob) < self.min_bytes and self.serializer == "j":
+            return blob.decode("utf-8")
+
+        packed = _compress(blob, self.compressor)
+        return f"{MAGIC}{self.serializer}{self.compressor}:{base64.b64encode(packed).decode('ascii')}"
+
+    @staticmethod
+    def decode(raw):
+        """Decodifica un valor leído de Redis. Devuelve el objeto Python (o None)."""
+        if raw is None:
+            return None
+        if not isinstance(raw, str):
+            # Ya deserializado por el cliente
+            return raw
+        if is_encoded(raw):
+            serializer = raw[len(MAGIC)]
+            compressor = raw[len(MAGIC) + 1]
+            blob = base64.b64decode(raw[HEADER_LEN:])
+            return _deserialize(_decompress(blob, compressor), serializer)
+        return json.loads(raw)
+
+
+def get_codec(name=None):
+    """ Codec de escritura (REDIS_CODEC). Falla al arrancar con un formato que el frontend no puede leer. """
+    name = (name or "zlib").lower()
+    if name not in WRITABLE_CODECS:
+        raise ValueError(f"REDIS_CODEC '{name}' no soportado: el frontend solo lee {', '.join(WRITABLE_CODECS)}")
+    return RedisCodec(name)
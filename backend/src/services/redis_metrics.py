@@ -0,0 +1,152 @@
+import os
+import sys
+import json
+import atexit
+import threading
+from datetime import datetime
+
+
+# Verbos sin clave: no cuentan para ninguna familia ("-")
+KEYLESS_VERBS = {"SCAN", "PING", "ECHO", "INFO", "DBSIZE", "TIME", "MULTI", "EXEC", "DISCARD", "FLUSHDB", "FLUSHALL", "SCRIPT"}
+
+
+def command_key(cmd):
+    """ Primera clave de un comando: cmd[1], salvo EVAL/EVALSHA (script, numkeys, KEYS...) y verbos sin clave """
+    verb = str(cmd[0]).upper() if cmd else "?"
+    if verb in ("EVAL", "EVALSHA"):
+        try:
+            return cmd[3] if int(cmd[2]) > 0 and len(cmd) > 3 else None
+        except (IndexError, TypeError, ValueError):
+            return None
+    if verb in KEYLESS_VERBS or len(cmd) < 2:
+        return None
+    return cmd[1]
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, max(0, int(round(pct / 100.0 * (len(sorted_values) - 1)))))
+    return sorted_values[idx]
+
+
+class RedisMetrics:
+    """
+    Contabilidad de round trips a Redis para el proceso actual.
+    Cuenta comandos por verbo y por familia de clave (daily_bets, check_logs, api_usage, status...),
+    latencia por round trip (p50/p95/p99) y bytes enviados/recibidos.
+    Al salir imprime un resumen y lo guarda en betai:perf:{YYYY-MM-DD} (lista, TTL 3 días)
+    para que el timeline del admin muestre el coste Redis de cada ejecución.
+    Compartido por todas las instancias de RedisService del proceso (ver get_metrics()).
+    """
+    def __init__(self):
+        self.enabled = os.getenv("REDIS_METRICS", "1") != "0"
+        self.script = os.path.basename(sys.argv[0]) if sys.argv and sys.argv[0] else "unknown"
+        self.started_at = datetime.now()
+        self.rs = None
+        self._lock = threading.Lock()
+        self.round_trips = 0
+        self.pipelines = 0
+        self.commands = 0
+        self.errors = 0
+        self.bytes_out = 0
+        self.bytes_in = 0
+        self.by_verb = {}    # verb -> {"count", "ms"}
+        self.by_family = {}  # family -> count
+        self.latencies = []  # ms por round trip
+
+    def attach(self, rs):
+        """ Instancia RedisService usada para persistir el resumen al salir (la última activa) """
+        if rs.is_active:
+            self.rs = rs
+
+    def set_script(self, name):
+        self.script = name
+
+    def key_family(self, key, prefix):
+        if not isinstance(key, str) or not key:
+            return "-"
+        if prefix and key.startswith(prefix):
+            key = key[len(prefix):]
+        return key.split(":", 1)[0] or "-"
+
+    def record(self, commands, elapsed_ms, bytes_out, bytes_in, prefix="", pipeline=False, error=False):
+        if not self.enabled:
+            return
+        with self._lock:
+            self.round_trips += 1
+            if pipeline: self.pipelines += 1
+            if error: self.errors += 1
+            self.bytes_out += bytes_out
+            self.bytes_in += bytes_in
+            self.latencies.append(elapsed_ms)
+            share = elapsed_ms / max(1, len(commands))
+            for cmd in commands:
+                verb = str(cmd[0]).upper() if cmd else "?"
+                key = command_key(cmd)
+                self.commands += 1
+                v = self.by_verb.setdefault(verb, {"count": 0, "ms": 0.0})
+                v["count"] += 1
+                v["ms"] += share
+                family = self.key_family(key, prefix)
+                self.by_family[family] = self.by_family.get(family, 0) + 1
+
+    def summary(self):
+        with self._lock:
+            lat = sorted(self.latencies)
+            return {
+                "script": self.script,
+                "started": self.started_at.strftime("%Y-%m-%d %H:%M:%S"),
+                "time": datetime.now().strftime("%H:%M:%S"),
+                "timestamp": datetime.now().timestamp(),
+                "round_trips": self.round_trips,
+                "pipelines": self.pipelines,
+                "commands": self.commands,
+                "errors": self.errors,
+                "bytes_out": self.bytes_out,
+                "bytes_in": self.bytes_in,
+                "total_ms": round(sum(lat), 1),
+                "p50_ms": round(_percentile(lat, 50), 1),
+                "p95_ms": round(_percentile(lat, 95), 1),
+                "p99_ms": round(_percentile(lat, 99), 1),
+                "max_ms": round(lat[-1], 1) if lat else 0.0,
+                "by_verb": {k: {"count": v["count"], "ms": round(v["ms"], 1)} for k, v in sorted(self.by_verb.items(), key=lambda kv: -kv[1]["count"])},
+                "by_family": dict(sorted(self.by_family.items(), key=lambda kv: -kv[1])),
+            }
+
+    def report(self):
+        """ Imprime el resumen y lo guarda en Redis. Registrado con atexit. """
+        if not self.enabled or not self.round_trips:
+            return None
+        s = self.summary()
+        print(f"[Redis/Perf] {s['script']}: {s['commands']} cmds en {s['round_trips']} round trips "
+              f"({s['pipelines']} pipelines, {s['errors']} errores) | "
+              f"p50 {s['p50_ms']}ms p95 {s['p95_ms']}ms p99 {s['p99_ms']}ms max {s['max_ms']}ms | "
+              f"total {s['total_ms']}ms | out {s['bytes_out'] / 1024:.1f}KB in {s['bytes_in'] / 1024:.1f}KB")
+        top_verbs = ", ".join(f"{k}={v['count']}" for k, v in list(s["by_verb"].items())[:8])
+        top_families = ", ".join(f"{k}={v}" for k, v in list(s["by_family"].items())[:8])
+        print(f"[Redis/Perf]   verbos: {top_verbs}")
+        print(f"[Redis/Perf]   claves: {top_families}")
+
+        if self.rs:
+            full_key = self.rs._get_key(f"perf:{datetime.now().strftime('%Y-%m-%d')}")
+            self.rs._send_pipeline([
+                ["RPUSH", full_key, json.dumps(s)],
+                ["EXPIRE", full_key, 86400 * 3],
+            ])
+        return s
+
+
+_metrics = None
+_metrics_lock = threading.Lock()
+
+
+def get_metrics():
+    global _metrics
+    with _metrics_lock:
+        if _metrics is None:
+            _metrics = RedisMetrics()
+            # Registrado antes que EventBuffer/ApiQuotaTracker: atexit es LIFO,
+            # así el resumen incluye sus volcados finales.
+            atexit.register(_metrics.report)
+        return _metrics
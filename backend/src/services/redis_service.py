@@ -1,7 +1,12 @@
 import os
 import json
+import time
+import threading
 import requests
 from datetime import datetime
+from src.services.redis_codec import RedisCodec, get_codec
+from src.services.redis_metrics import get_metrics
+from src.services.pick_compiler import compile_selection
 
 try:
     from dotenv import load_dotenv
@@ -30,6 +35,8 @@ class RedisService:
         self.url = os.getenv("REDIS_URL") or os.getenv("UPSTASH_REDIS_REST_URL")
         self.token = os.getenv("REDIS_TOKEN") or os.getenv("UPSTASH_REDIS_REST_TOKEN")
         self.prefix = os.getenv("REDIS_PREFIX", "betai:")
+        # Codec para payloads grandes (raw_matches): zlib | json (legacy sin comprimir). Otros valores fallan aquí.
+        self.codec = get_codec(os.getenv("REDIS_CODEC", "zlib"))
         
         if self.url and self.token:
             print(f"[Redis] Configurado modo HTTP (Upstash REST). Prefix: '{self.prefix}'")
@@ -38,6 +45,13 @@ class RedisService:
             print(f"[Redis] FALTA CONFIGUTACIÓN. URL={bool(self.url)}, TOKEN={bool(self.token)}")
             self.is_active = False
 
+        # Helpers perezosos (event_buffer, check_log, ...): se crean una sola vez aunque los pidan varios hilos a la vez
+        self._helpers_lock = threading.RLock()
+
+        # Contadores de round trips / latencia (resumen al salir -> betai:perf:{date})
+        self.metrics = get_metrics()
+        self.metrics.attach(self)
+
     def _get_key(self, key_part):
         # Ensure we don't double prefix if someone passes an already prefixed key accidentally
         if key_part.startswith(self.prefix):
@@ -51,8 +65,11 @@ class RedisService:
             headers = {"Authorization": f"Bearer {self.token}"}
             # Upstash format: ["COMMAND", "arg1", "arg2"]
             cmd_list = [command] + list(args)
+            t0 = time.perf_counter()
             resp = requests.post(full_url, headers=headers, json=cmd_list)
+            elapsed_ms = (time.perf_counter() - t0) * 1000
             data = resp.json()
+            self._record(resp, [cmd_list], elapsed_ms, error="error" in data)
             if "error" in data:
                 print(f"[Redis] Error Upstash: {data['error']}")
                 return None
@@ -61,6 +78,98 @@ class RedisService:
             print(f"[Redis] Exception: {e}")
             return None
 
+    def _send_pipeline(self, commands):
+        """
+        Envía varios comandos en un único round trip (Upstash REST /pipeline).
+        commands: [["RPUSH", key, v1, v2], ["EXPIRE", key, 60], ...]
+        Devuelve la lista de resultados (None por comando con error) o None si falla la petición.
+        """
+        if not self.is_active or not commands: return None
+        try:
+            full_url = f"{self.url.rstrip('/')}/pipeline"
+            headers = {"Authorization": f"Bearer {self.token}"}
+            cmd_lists = [list(c) for c in commands]
+            t0 = time.perf_counter()
+            resp = requests.post(full_url, headers=headers, json=cmd_lists)
+            elapsed_ms = (time.perf_counter() - t0) * 1000
+            data = resp.json()
+            self._record(resp, cmd_lists, elapsed_ms, pipeline=True,
+                         error=isinstance(data, dict) or any(isinstance(i, dict) and "error" in i for i in data))
+            if isinstance(data, dict) and "error" in data:
+                print(f"[Redis] Error Upstash (pipeline): {data['error']}")
+                return None
+            results = []
+            for item in data:
+                if isinstance(item, dict) and "error" in item:
+                    print(f"[Redis] Error Upstash (pipeline): {item['error']}")
+                    results.append(None)
+                else:
+                    results.append(item.get("result") if isinstance(item, dict) else item)
+            return results
+        except Exception as e:
+            print(f"[Redis] Exception (pipeline): {e}")
+            return None
+
+    def _record(self, resp, commands, elapsed_ms, pipeline=False, error=False):
+        """ Anota un round trip en las métricas del proceso (nunca rompe la llamada) """
+        try:
+            body = resp.request.body or b""
+            self.metrics.record(commands, elapsed_ms, len(body), len(resp.content or b""),
+                                prefix=self.prefix, pipeline=pipeline, error=error)
+        except Exception:
+            pass
+
+    def _helper(self, attr, factory):
+        """ Instancia compartida de un helper, creada bajo lock (los workers de check_bets la piden en paralelo) """
+        helper = getattr(self, attr, None)
+        if helper is None:
+            with self._helpers_lock:
+                helper = getattr(self, attr, None)
+                if helper is None:
+                    helper = factory()
+                    setattr(self, attr, helper)
+        return helper
+
+    @property
+    def event_buffer(self):
+        """ Buffer write-behind compartido para listas de logs (check_logs, execution_history) """
+        def create():
+            from src.services.event_buffer import EventBuffer
+            return EventBuffer(self)
+        return self._helper("_event_buffer", create)
+
+    @property
+    def check_log(self):
+        """ Log del comprobador por fecha: ring buffer + deduplicación de estados repetidos (check_logs:*) """
+        def create():
+            from src.services.check_log import CheckLog
+            return CheckLog(self)
+        return self._helper("_check_log", create)
+
+    @property
+    def gemini_cache(self):
+        """ Caché de respuestas de Gemini por hash de (modelo, config, prompt) (gemini_cache:*) """
+        def create():
+            from src.services.gemini_cache import GeminiCache
+            return GeminiCache(self)
+        return self._helper("_gemini_cache", create)
+
+    @property
+    def due_index(self):
+        """ ZSET de selecciones pendientes por hora de liquidación (check_bets) """
+        def create():
+            from src.services.due_index import DueIndex
+            return DueIndex(self)
+        return self._helper("_due_index", create)
+
+    @property
+    def quota_tracker(self):
+        """ Contabilidad de cuota API coalescida (api_usage:*), volcada en lote """
+        def create():
+            from src.services.api_quota import ApiQuotaTracker
+            return ApiQuotaTracker(self)
+        return self._helper("_quota_tracker", create)
+
     def save_daily_bets(self, date_str, bets_data, category="daily_bets"):
         if not self.is_active: return
         
@@ -102,6 +211,10 @@ class RedisService:
                         "status": "PENDING",
                         "result": None 
                     }
+                    # Spec estructurada del mercado: se compila una vez aquí y el comprobador liquida con ella
+                    norm_sel["spec"] = compile_selection({**norm_sel, "spec": sel.get("spec")})
+                    if norm_sel["spec"].get("error"):
+                        print(f"[Redis] [PICK-COMPILER] Pick no compilable '{norm_sel['pick']}' ({norm_sel['match']}): {norm_sel['spec']['error']}")
                     normalized_selections.append(norm_sel)
 
             stake = float(data.get("stake", stakes.get(bet_type, 1)))
@@ -131,6 +244,20 @@ class RedisService:
         self._send_command("HSET", hash_key, date_str, json.dumps(full_day_data))
         print(f"[Redis] Guardado FULL ({category}) OK: {hash_key} -> {date_str}")
 
+        # Índice de vencimientos para el comprobador (selecciones pendientes por hora de liquidación)
+        try:
+            self.due_index.index_day(category, date_str, full_day_data)
+        except Exception as e:
+            print(f"[Redis] Error actualizando due_index: {e}")
+
+        # Estadísticas incrementales: el día se re-lee en la siguiente publicación
+        try:
+            from src.services.stats_engine import StatsEngine, STATS_CATEGORIES
+            if category in STATS_CATEGORIES:
+                StatsEngine(self, category=category).mark_dirty(date_str)
+        except Exception as e:
+            print(f"[Redis] Error marcando stats_agg: {e}")
+
         # --- 3. SMART MIRROR LOGIC (Master Key) ---
         import copy
         mirror_data = copy.deepcopy(full_day_data)
@@ -159,29 +286,43 @@ class RedisService:
         hash_key = self._get_key(f"{category}:{year_month}")
         return self._send_command("HGET", hash_key, date_str)
 
-    def save_raw_matches(self, date_str, matches_data):
-        """ Save raw matches to Monthly Hash """
+    # --- CODEC (Large Payloads) ---
+    def encode_payload(self, data):
+        """ Serializa con el codec configurado (compresión + cabecera mágica) """
+        return self.codec.encode(data)
+
+    def decode_payload(self, raw):
+        """ Decodifica tanto JSON legacy como el formato comprimido. Devuelve objeto Python. """
+        try:
+            return RedisCodec.decode(raw)
+        except Exception as e:
+            print(f"[Redis] Error decodificando payload: {e}")
+            return None
+
+    def save_raw_matches(self, date_str, matches_data, category="raw_matches"):
+        """ Save raw matches to Monthly Hash (raw_matches or raw_matches_tiktok) """
         if not self.is_active: return
         year_month = date_str[:7]
-        hash_key = self._get_key(f"raw_matches:{year_month}")
-        self._send_command("HSET", hash_key, date_str, json.dumps(matches_data))
-        print(f"[Redis] Raw Matches Saved to {hash_key} -> {date_str}")
+        hash_key = self._get_key(f"{category}:{year_month}")
+        payload = self.encode_payload(matches_data)
+        self._send_command("HSET", hash_key, date_str, payload)
+        print(f"[Redis] Raw Matches Saved to {hash_key} -> {date_str} ({len(payload)} bytes, codec={self.codec.name})")
 
-    def get_raw_matches(self, date_str):
-        """ Get raw matches from Monthly Hash """
+    def get_raw_matches(self, date_str, category="raw_matches"):
+        """ Get raw matches from Monthly Hash. Returns the decoded list (old JSON or compressed format) """
         if not self.is_active: return None
         year_month = date_str[:7]
-        hash_key = self._get_key(f"raw_matches:{year_month}")
-        return self._send_command("HGET", hash_key, date_str)
+        hash_key = self._get_key(f"{category}:{year_month}")
+        return self.decode_payload(self._send_command("HGET", hash_key, date_str))
 
     def get_month_bets(self, year_month, category="daily_bets"):
-        """ Get ALL bets for a month (HGETALL) """
+        """ Get ALL bets for a month (HSCAN, returned as dict) """
         if not self.is_active: return None
-        hash_key = self._get_key(f"{category}:{year_month}")
-        res = self._send_command("HGETALL", hash_key)
-        if isinstance(res, list):
-             return dict(zip(res[::2], res[1::2]))
-        return res
+        return dict(self.iter_month_bets(year_month, category=category))
+
+    def iter_month_bets(self, year_month, category="daily_bets"):
+        """ Streams (date, raw_json) pairs of a monthly hash without loading it at once """
+        return self.hscan_iter(f"{category}:{year_month}")
 
     # Helper for Check Results (Generic)
     def get(self, key):
@@ -209,18 +350,69 @@ class RedisService:
     def hget(self, key, field):
         full_key = self._get_key(key)
         return self._send_command("HGET", full_key, field)
+
+    def hmget(self, key, *fields):
+        # HMGET key field [field ...] -> lista alineada con fields (None si no existe)
+        if not fields: return []
+        full_key = self._get_key(key)
+        res = self._send_command("HMGET", full_key, *fields)
+        return res if isinstance(res, list) else [None] * len(fields)
     
     def ping(self):
         return self._send_command("PING")
 
     def keys(self, pattern):
+        # Compat: mismo resultado que KEYS pero vía SCAN (no bloquea el servidor)
+        return list(self.scan_iter(pattern))
+
+    def scan_iter(self, pattern="*", count=200):
+        """
+        Itera claves con SCAN (cursor) en lugar de KEYS.
+        Devuelve las claves completas (con prefijo) de forma perezosa, página a página.
+        count: tamaño de página sugerido a Redis (COUNT).
+        """
+        if not self.is_active: return
         full_pattern = self._get_key(pattern)
-        return self._send_command("KEYS", full_pattern)
+        cursor = "0"
+        while True:
+            res = self._send_command("SCAN", cursor, "MATCH", full_pattern, "COUNT", count)
+            if not res or not isinstance(res, list) or len(res) != 2:
+                return
+            cursor, page = str(res[0]), res[1] or []
+            for key in page:
+                yield key
+            if cursor == "0":
+                return
+
+    def hscan_iter(self, key, match=None, count=200):
+        """
+        Itera los campos de un Hash con HSCAN. Yields (field, value) sin cargar todo el Hash.
+        """
+        if not self.is_active: return
+        full_key = self._get_key(key)
+        cursor = "0"
+        while True:
+            args = [full_key, cursor]
+            if match:
+                args.extend(["MATCH", match])
+            args.extend(["COUNT", count])
+            res = self._send_command("HSCAN", *args)
+            if not res or not isinstance(res, list) or len(res) != 2:
+                return
+            cursor, page = str(res[0]), res[1] or []
+            for i in range(0, len(page) - 1, 2):
+                yield page[i], page[i + 1]
+            if cursor == "0":
+                return
+
+    def exists(self, key):
+        full_key = self._get_key(key)
+        return self._send_command("EXISTS", full_key)
 
-    def rpush(self, key, value):
+    def rpush(self, key, *values):
         full_key = self._get_key(key)
         # RPUSH key value [value ...]
-        return self._send_command("RPUSH", full_key, value)
+        return self._send_command("RPUSH", full_key, *values)
 
     def expire(self, key, seconds):
         full_key = self._get_key(key)
@@ -341,6 +533,9 @@ class RedisService:
         Key: betai:execution_history:YYYY-MM-DD
         """
         if not self.is_active: return
+        if status == "START":
+            # El resumen de perf se etiqueta con el mismo nombre que el timeline
+            self.metrics.set_script(script_name)
         
         try:
             now = datetime.now()
@@ -356,8 +551,10 @@ class RedisService:
             }
             
             key = f"execution_history:{date_str}"
-            self.rpush(key, json.dumps(event))
-            self.expire(key, 86400 * 3) # Keep for 3 days
+            self.event_buffer.push(key, json.dumps(event), ttl=86400 * 3) # Keep for 3 days
+            if status == "START":
+                # El timeline del admin usa START para mostrar el script "en curso": no esperar al lote
+                self.event_buffer.flush()
             print(f"[Redis] Logged Execution: {script_name} -> {status}")
         except Exception as e:
             print(f"[Redis] Error logging execution: {e}")
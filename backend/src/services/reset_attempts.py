@@ -55,6 +55,7 @@ def reset_attempts():
             
     if modified:
         rs.set_data(f"daily_bets:{target_date}", data)
+        rs.due_index.index_day("daily_bets", target_date, data)
         print("Redis updated successfully.")
     else:
         print("No bets needed resetting.")
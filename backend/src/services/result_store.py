@@ -0,0 +1,55 @@
+class ResultStore:
+    """
+    Almacén permanente de resultados de partidos terminados (FT/AET/PEN, FT/AOT en basket).
+    Un resultado final no cambia nunca: se escribe una vez y se consulta antes de cualquier llamada a la API.
+    Layout: HASH results:{sport} -> field = fixture id de la API (sin sufijo _stakazo),
+    value = registro parseado (marcador, HT, córners, tarjetas, tiros, jugadores) codificado con el codec de RedisService.
+    """
+    def __init__(self, rs):
+        self.rs = rs
+        self._memo = {}  # (sport, fid) -> registro ya leído/escrito en este proceso
+
+    def _key(self, sport):
+        return f"results:{sport}"
+
+    @staticmethod
+    def is_final(record):
+        """ Solo se guardan registros completos: los PENDING, en directo (LIVE) o vacíos se vuelven a consultar """
+        return isinstance(record, dict) and record.get("status") not in ("PENDING", "LIVE") and record.get("home_score") is not None
+
+    def get_many(self, sport, fixture_ids):
+        """ {fid: registro} para los ids ya terminados. Un único HMGET por deporte. """
+        ids = [str(f) for f in dict.fromkeys(fixture_ids) if f]
+        found = {}
+        missing = []
+        for fid in ids:
+            if (sport, fid) in self._memo:
+                found[fid] = self._memo[(sport, fid)]
+            else:
+                missing.append(fid)
+
+        if missing and self.rs.is_active:
+            raw_values = self.rs.hmget(self._key(sport), *missing)
+            for fid, raw in zip(missing, raw_values):
+                if not raw: continue
+                record = self.rs.decode_payload(raw)
+                if self.is_final(record):
+                    self._memo[(sport, fid)] = record
+                    found[fid] = record
+        return found
+
+    def put_many(self, sport, records):
+        """ Guarda los registros finales de {fid: registro}. Un único HSET multi-campo. """
+        mapping = {}
+        for fid, record in records.items():
+            if not self.is_final(record): continue
+            self._memo[(sport, str(fid))] = record
+            mapping[str(fid)] = self.rs.encode_payload(record)
+
+        if mapping and self.rs.is_active:
+            self.rs.hset(self._key(sport), mapping)
+            print(f"      [RESULT-STORE] {len(mapping)} {sport} results stored")
+        return len(mapping)
+
+    def put(self, sport, fixture_id, record):
+        return self.put_many(sport, {str(fixture_id): record})
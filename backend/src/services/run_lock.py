@@ -0,0 +1,93 @@
+import os
+import time
+import uuid
+import socket
+
+
+# Liberar / renovar solo si el lease sigue siendo nuestro (atómico en Redis)
+RELEASE_SCRIPT = "if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('del', KEYS[1]) else return 0 end"
+RENEW_SCRIPT = "if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('pexpire', KEYS[1], ARGV[2]) else return 0 end"
+
+# Identificador de esta ejecución (host:pid:aleatorio): valor de locks y claims, útil para ver quién los tiene
+RUN_TOKEN = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class LeaseLock:
+    """
+    Lock con lease: SET lock:{name} {token} NX PX ttl.
+    Si el proceso que lo tiene muere, el lease caduca solo; release/renew comprueban el token (EVAL)
+    para no borrar nunca el lock que otra ejecución haya tomado después de la caducidad.
+    Sin Redis activo no hay nada que coordinar: acquire() devuelve True.
+    """
+    def __init__(self, rs, name, ttl_ms=60000, token=None):
+        self.rs = rs
+        self.name = name
+        self.ttl_ms = int(ttl_ms)
+        self.token = token or f"{RUN_TOKEN}:{uuid.uuid4().hex[:6]}"
+        self.held = False
+
+    def _key(self):
+        return self.rs._get_key(f"lock:{self.name}")
+
+    def acquire(self, wait_ms=0, retry_ms=100):
+        if not self.rs.is_active:
+            self.held = True
+            return True
+        deadline = time.monotonic() + wait_ms / 1000.0
+        while True:
+            if self.rs._send_command("SET", self._key(), self.token, "NX", "PX", self.ttl_ms) == "OK":
+                self.held = True
+                return True
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(retry_ms / 1000.0)
+
+    def renew(self):
+        if not self.rs.is_active: return True
+        return bool(self.rs._send_command("EVAL", RENEW_SCRIPT, 1, self._key(), self.token, self.ttl_ms))
+
+    def release(self):
+        if not self.held: return
+        self.held = False
+        if self.rs.is_active:
+            self.rs._send_command("EVAL", RELEASE_SCRIPT, 1, self._key(), self.token)
+
+    def holder(self):
+        return self.rs._send_command("GET", self._key()) if self.rs.is_active else None
+
+
+class WorkClaims:
+    """
+    Reparto de fixtures entre ejecuciones del comprobador que se solapan (cron, trigger manual, ejecución lenta).
+    claim:{sport}:{fixture_id} = token de la ejecución (SET NX PX, un pipeline por lote).
+    Cada ejecución consulta en la API solo lo que ha reclamado; lo reclamado por otra queda PENDING
+    y lo liquida ella. release_all() al terminar; si el proceso muere, los claims caducan con el TTL.
+    """
+    def __init__(self, rs, ttl_ms=600000, token=None):
+        self.rs = rs
+        self.ttl_ms = int(ttl_ms)
+        self.token = token or f"{RUN_TOKEN}:{uuid.uuid4().hex[:6]}"
+        self.claimed = []
+
+    def _key(self, sport, fixture_id):
+        return self.rs._get_key(f"claim:{sport}:{fixture_id}")
+
+    def claim(self, sport, fixture_ids):
+        """ Devuelve el subconjunto de fixture_ids reclamado por esta ejecución """
+        ids = [str(f) for f in dict.fromkeys(fixture_ids) if f]
+        if not ids: return set()
+        if not self.rs.is_active: return set(ids)
+
+        results = self.rs._send_pipeline([["SET", self._key(sport, fid), self.token, "NX", "PX", self.ttl_ms] for fid in ids])
+        if results is None:
+            # Pipeline failed: better a duplicated API call than a fixture nobody checks
+            print(f"      [CLAIM-WARN] Claim pipeline failed, checking {len(ids)} {sport} fixtures anyway")
+            return set(ids)
+        mine = set(fid for fid, res in zip(ids, results) if res == "OK")
+        self.claimed.extend((sport, fid) for fid in mine)
+        return mine
+
+    def release_all(self):
+        if not self.claimed or not self.rs.is_active: return
+        self.rs._send_pipeline([["EVAL", RELEASE_SCRIPT, 1, self._key(sport, fid), self.token] for sport, fid in self.claimed])
+        self.claimed = []
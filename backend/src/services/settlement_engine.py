@@ -0,0 +1,255 @@
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+from src.services.pick_settlement import settle_spec, STAT_LABELS
+
+
+# Familias de mercado evaluadas por columnas. Player props y combinadas siguen por settle_spec (fila a fila):
+# dependen de la plantilla de jugadores o de varias patas.
+VECTOR_MARKETS = ("winner", "double_chance", "btts", "stat_total", "total", "handicap", "unknown")
+MARKET_CODES = {m: i for i, m in enumerate(VECTOR_MARKETS)}
+SIDE_CODES = {"home": 1, "away": 2, "draw": 3, "1x": 4, "x2": 5, "12": 6, "yes": 7, "no": 8, "over": 9, "under": 10}
+TEAM_CODES = {"home": 1, "away": 2}
+
+PENDING, WON, LOST, VOID = 0, 1, 2, 3
+STATUS_NAMES = {PENDING: "PENDING", WON: "WON", LOST: "LOST", VOID: "VOID"}
+
+# Estados de selección para el agregado de la apuesta (mismas reglas que check_bets)
+SEL_WON, SEL_LOST, SEL_VOID, SEL_PUSH, SEL_PENDING = 1, 2, 3, 4, 0
+SEL_CODES = {"WON": SEL_WON, "LOST": SEL_LOST, "VOID": SEL_VOID, "NULA": SEL_VOID, "PUSH": SEL_PUSH}
+
+
+def _is_number(v):
+    return isinstance(v, (int, float)) and not isinstance(v, bool)
+
+
+def _scores(spec, data):
+    if spec.get("period") == "HT":
+        return data.get("home_score_ht"), data.get("away_score_ht")
+    return data.get("home_score"), data.get("away_score")
+
+
+def _vectorizable(spec, data):
+    if not isinstance(spec, dict) or not isinstance(data, dict): return False
+    market = spec.get("market", "unknown")
+    if market not in MARKET_CODES: return False
+    h, a = _scores(spec, data)
+    if spec.get("period") == "HT":
+        # HT sin marcador todavía -> PENDING (columna missing)
+        if (h is not None and not _is_number(h)) or (a is not None and not _is_number(a)): return False
+    elif not (_is_number(h) and _is_number(a)):
+        return False
+    if market in ("stat_total", "total", "handicap") and not _is_number(spec.get("line") or 0): return False
+    if market == "stat_total":
+        stat = spec.get("stat")
+        if stat not in STAT_LABELS: return False
+        value = data.get(stat)
+        # Sin córners settle_spec lanza "No Corner Data" (el llamador lo pone en blacklist)
+        if value is None and stat == "corners": return False
+        if value is not None and not _is_number(value): return False
+    return True
+
+
+def _settle_scalar(spec, data, sport, resolve_player):
+    try:
+        return settle_spec(spec, data, sport, resolve_player)
+    except Exception as e:
+        return "ERROR", str(e), "ERROR"
+
+
+def _settle_vector(rows):
+    """ rows: [(spec, data, sport)] todas vectorizables. Devuelve [(status, result_str, log_level)]. """
+    n = len(rows)
+    specs = [r[0] for r in rows]
+    datas = [r[1] for r in rows]
+    sports = [r[2] for r in rows]
+
+    raw = [_scores(s, d) for s, d in zip(specs, datas)]
+    missing = np.array([h is None or a is None for h, a in raw], dtype=bool)
+    hs = np.array([h if h is not None else 0 for h, _ in raw], dtype=float)
+    aws = np.array([a if a is not None else 0 for _, a in raw], dtype=float)
+
+    market = np.array([MARKET_CODES[s.get("market", "unknown")] for s in specs], dtype=np.int8)
+    side = np.array([SIDE_CODES.get(s.get("side"), 0) for s in specs], dtype=np.int8)
+    team = np.array([TEAM_CODES.get(s.get("team"), 0) for s in specs], dtype=np.int8)
+    line = np.array([s.get("line") or 0 for s in specs], dtype=float)
+    void_on_draw = np.array([bool(s.get("void_on_draw")) for s in specs], dtype=bool)
+    win_on_draw = np.array([bool(s.get("win_on_draw")) for s in specs], dtype=bool)
+    stat_raw = [d.get(s.get("stat")) if s.get("market") == "stat_total" else None for s, d in zip(specs, datas)]
+    stat_val = np.array([v if v is not None else 0 for v in stat_raw], dtype=float)
+
+    draw = hs == aws
+    won = np.zeros(n, dtype=bool)
+
+    # 1X2
+    m = market == MARKET_CODES["winner"]
+    won |= m & (((side == SIDE_CODES["home"]) & (hs > aws)) |
+                ((side == SIDE_CODES["away"]) & (aws > hs)) |
+                ((side == SIDE_CODES["draw"]) & draw))
+
+    # Doble oportunidad
+    m = market == MARKET_CODES["double_chance"]
+    won |= m & (((side == SIDE_CODES["1x"]) & (hs >= aws)) |
+                ((side == SIDE_CODES["x2"]) & (aws >= hs)) |
+                ((side == SIDE_CODES["12"]) & ~draw))
+
+    # BTTS
+    m = market == MARKET_CODES["btts"]
+    won |= m & np.where(side == SIDE_CODES["yes"], (hs > 0) & (aws > 0), (hs == 0) | (aws == 0))
+
+    # Over/Under: córners/tarjetas/tiros y goles/puntos (total o por equipo)
+    is_stat = market == MARKET_CODES["stat_total"]
+    is_total = market == MARKET_CODES["total"]
+    value = np.where(is_stat, stat_val,
+                     np.where(team == TEAM_CODES["home"], hs,
+                              np.where(team == TEAM_CODES["away"], aws, hs + aws)))
+    over = side == SIDE_CODES["over"]
+    won |= (is_stat | is_total) & np.where(over, value > line, value < line)
+
+    # Hándicap (push -> VOID)
+    is_away = side == SIDE_CODES["away"]
+    hcp = (market == MARKET_CODES["handicap"]) & ((side == SIDE_CODES["home"]) | is_away)
+    own = np.where(is_away, aws, hs)
+    other = np.where(is_away, hs, aws)
+    adjusted = own + line
+    push = hcp & (adjusted == other)
+    won |= hcp & (adjusted > other)
+    margin_diff = (own - other) - (np.floor(-line) + 1)
+
+    status = np.where(won, WON, LOST).astype(np.int8)
+    status[push] = VOID
+    # Reglas de empate (antes que el mercado): DNB -> VOID, "Empate" -> WON
+    void_rule = draw & void_on_draw
+    win_rule = draw & ~void_on_draw & win_on_draw
+    status[void_rule] = VOID
+    status[win_rule] = WON
+    status[missing] = PENDING
+
+    out = []
+    for i in range(n):
+        if missing[i]:
+            out.append(("PENDING", "Waiting for HT Result", "PENDING"))
+            continue
+        h, a = raw[i]
+        base = f"{h}-{a} (HT)" if specs[i].get("period") == "HT" else f"{h}-{a}"
+        if void_rule[i]:
+            out.append(("VOID", f"{h}-{a} (Void)", None))
+        elif win_rule[i]:
+            out.append(("WON", base, None))
+        elif push[i]:
+            out.append(("VOID", f"{h}-{a} (Push)", None))
+        else:
+            out.append((STATUS_NAMES[int(status[i])], _result_str(specs[i], h, a, base, stat_raw[i], sports[i], hcp[i], margin_diff[i]), None))
+    return out
+
+
+def _result_str(spec, h, a, base, stat_value, sport, hcp_valid, margin_diff):
+    """ Mismo texto de resultado que los settlers de pick_settlement """
+    market = spec.get("market")
+    if market == "stat_total":
+        total = stat_value if stat_value is not None else 0
+        return f"{h}-{a} | {total} {STAT_LABELS[spec['stat']]}"
+    if market == "total":
+        team = spec.get("team")
+        if team == "home": total, team_name = h, spec.get("home")
+        elif team == "away": total, team_name = a, spec.get("away")
+        else: total, team_name = h + a, None
+        label = "Puntos" if sport == "basketball" else "Goles"
+        if team_name:
+            return f"{h}-{a} | {total} {label} ({team_name})"
+        return f"{h}-{a} | {total} {label}"
+    if market == "handicap" and hcp_valid:
+        diff = int(margin_diff)
+        res_val = f"{'+' if diff >= 0 else ''}{diff}"
+        if sport == "basketball": res_val += " Pts"
+        return f"{base} | {res_val}"
+    return base
+
+
+def settle_rows(rows):
+    """
+    Liquida un lote de selecciones de una vez.
+    rows: [(spec, data, sport, resolve_player)] -> [(status, result_str, log_level)] en el mismo orden,
+    status WON | LOST | VOID | PENDING | ERROR (ERROR = excepción de settle_spec, p.ej. sin datos de córners).
+    Las familias de VECTOR_MARKETS se evalúan con máscaras NumPy; el resto (o todo, sin NumPy) con settle_spec.
+    """
+    out = [None] * len(rows)
+    vec_idx = []
+    for i, (spec, data, sport, resolve_player) in enumerate(rows):
+        if NUMPY_AVAILABLE and _vectorizable(spec, data):
+            vec_idx.append(i)
+        else:
+            out[i] = _settle_scalar(spec, data, sport, resolve_player)
+
+    if vec_idx:
+        results = _settle_vector([(rows[i][0], rows[i][1], rows[i][2]) for i in vec_idx])
+        for i, res in zip(vec_idx, results):
+            out[i] = res
+    return out
+
+
+def _aggregate_scalar(bets):
+    out = []
+    for stake, selections in bets:
+        if not selections:
+            out.append((None, None))
+            continue
+        codes = [SEL_CODES.get(s, SEL_PENDING) for s, _ in selections]
+        if SEL_LOST in codes:
+            out.append(("LOST", -1 * stake))
+        elif SEL_PENDING in codes:
+            out.append((None, None))
+        elif all(c == SEL_VOID for c in codes):
+            out.append(("VOID", 0.0))
+        else:
+            effective_odd = 1.0
+            for (s, odd), c in zip(selections, codes):
+                if c == SEL_WON: effective_odd *= float(odd if odd is not None else 1.0)
+            out.append(("WON", round(stake * (effective_odd - 1), 2)))
+    return out
+
+
+def aggregate_bets(bets):
+    """
+    Estado y profit de cada apuesta a partir de sus selecciones, con las reglas de check_bets:
+    alguna LOST -> LOST (-stake); alguna pendiente -> sin cambios; todas VOID/NULA -> VOID (0.0);
+    si no -> WON con stake * (producto de cuotas WON - 1). PUSH no cuenta como nula ni multiplica la cuota.
+    bets: [(stake, [(status, odd), ...])] -> [(status, profit)]; (None, None) = sigue pendiente.
+    """
+    if not NUMPY_AVAILABLE:
+        return _aggregate_scalar(bets)
+
+    out = [(None, None)] * len(bets)
+    active = [i for i, (_, sels) in enumerate(bets) if sels]
+    if not active:
+        return out
+
+    lengths = np.array([len(bets[i][1]) for i in active])
+    starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    codes = np.array([SEL_CODES.get(s, SEL_PENDING) for i in active for s, _ in bets[i][1]], dtype=np.int8)
+    odds = np.array([float(o if o is not None else 1.0) for i in active for _, o in bets[i][1]], dtype=float)
+    bet_idx = np.repeat(np.arange(len(active)), lengths)
+
+    def count(mask):
+        return np.bincount(bet_idx, weights=mask, minlength=len(active))
+
+    any_lost = count(codes == SEL_LOST) > 0
+    any_pending = count(codes == SEL_PENDING) > 0
+    all_void = count(codes == SEL_VOID) == lengths
+    # Producto secuencial (multiply.reduceat) para obtener exactamente la misma cuota que el bucle
+    effective_odd = np.multiply.reduceat(np.where(codes == SEL_WON, odds, 1.0), starts)
+
+    for k, i in enumerate(active):
+        stake = bets[i][0]
+        if any_lost[k]:
+            out[i] = ("LOST", -1 * stake)
+        elif any_pending[k]:
+            continue
+        elif all_void[k]:
+            out[i] = ("VOID", 0.0)
+        else:
+            out[i] = ("WON", round(stake * (float(effective_odd[k]) - 1), 2))
+    return out
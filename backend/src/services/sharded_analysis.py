@@ -0,0 +1,170 @@
+import os
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from src.services.prompt_encoder import render_matches, row_parts, estimate_tokens
+from src.services.prompt_budget import league_tier
+from src.services.gemini_cache import json_response_ok
+
+
+# Análisis en dos fases (ANALYSIS_MODE=sharded, o auto con jornadas grandes):
+#   map:    los partidos se reparten en grupos por deporte/liga y cada grupo pide en paralelo sus mejores
+#           selecciones candidatas (fixture_id, pick, cuota, confianza, motivo corto). Cada grupo se
+#           reintenta por separado; si uno falla del todo, se sigue con los demás.
+#   reduce: el prompt final (mismo system prompt y formato de salida SAFE/VALUE/FUNBET) solo contiene
+#           las cabeceras de los partidos preseleccionados y sus candidatos. Ese prompt es el que
+#           reintenta el bucle del analizador: un JSON roto ya no repite toda la jornada.
+
+SHARD_MAX_MATCHES = 12
+SHORTLIST_SIZE = 6
+SHARD_RETRIES = 3
+SHARD_WORKERS = 4
+AUTO_MIN_MATCHES = 30   # ANALYSIS_MODE=auto: por debajo, un solo prompt
+
+SHORTLIST_INSTRUCTION = """FASE 1 - PRESELECCIÓN ({group}, grupo {index}/{total}).
+NO construyas todavía las apuestas finales ni apliques las reglas de SAFE/VALUE/FUNBET.
+Aplica tu análisis (cuotas, predictions, H2H) y devuelve ÚNICAMENTE un array JSON con las {size} mejores
+selecciones candidatas de este grupo, de más a menos confianza:
+[{{"fixture_id": 123456, "pick": "Mercado específico", "odd": 1.55, "confidence": 80, "reason": "Motivo técnico en máximo 25 palabras"}}]
+Usa solo mercados y cuotas que aparezcan en los datos. Puedes dar varias selecciones del mismo partido."""
+
+FINAL_INSTRUCTION = """FASE FINAL - SELECCIÓN.
+Los partidos ya se han analizado por grupos y cada grupo ha devuelto sus mejores candidatos.
+Construye las apuestas ÚNICAMENTE con los candidatos de la lista (mismo fixture_id, mismo pick, misma cuota).
+Puedes combinar candidatos de distintos grupos y descartar los que no encajen. Respeta todas las reglas
+y el formato de salida indicados arriba."""
+
+
+def analysis_mode(n_matches=0):
+    """ single | sharded (ANALYSIS_MODE=auto elige sharded a partir de AUTO_MIN_MATCHES partidos) """
+    mode = os.getenv("ANALYSIS_MODE", "single").lower()
+    if mode == "auto":
+        return "sharded" if n_matches >= int(os.getenv("ANALYSIS_SHARD_AUTO_MIN", AUTO_MIN_MATCHES)) else "single"
+    return "sharded" if mode == "sharded" else "single"
+
+
+def shard_matches(matches, max_per_shard=None):
+    """
+    Grupos de como mucho max_per_shard partidos: por deporte, ligas de nivel 1 primero y cada liga
+    entera en el mismo grupo mientras quepa (las muy grandes se parten). Determinista.
+    """
+    max_per_shard = max_per_shard or int(os.getenv("ANALYSIS_SHARD_SIZE", SHARD_MAX_MATCHES))
+    leagues = {}
+    for m in matches:
+        leagues.setdefault((m.get("sport") or "football", league_tier(m), str(m.get("league", ""))), []).append(m)
+
+    shards = []
+    current, sport = [], None
+    for (league_sport, _tier, _name), group in sorted(leagues.items()):
+        if current and (league_sport != sport or len(current) + len(group) > max_per_shard):
+            shards.append(current)
+            current = []
+        sport = league_sport
+        for i in range(0, len(group), max_per_shard):
+            chunk = group[i:i + max_per_shard]
+            if current and len(current) + len(chunk) > max_per_shard:
+                shards.append(current)
+                current = []
+            current.extend(chunk)
+    if current: shards.append(current)
+    return shards
+
+
+def _shard_name(shard):
+    sport = (shard[0].get("sport") or "football") if shard else ""
+    names = list(dict.fromkeys(str(m.get("league", "")) for m in shard))
+    return f"{sport}: " + ", ".join(names[:3]) + (f" +{len(names) - 3}" if len(names) > 3 else "")
+
+
+def _parse_list(text):
+    text = (text or "").strip().replace("```json", "").replace("```", "").strip()
+    start, end = text.find("["), text.rfind("]")
+    data = json.loads(text[start:end + 1] if start != -1 and end > start else text)
+    if not isinstance(data, list): raise ValueError("Shortlist is not a JSON array")
+    return data
+
+
+def _clean_candidates(candidates, shard, size):
+    """ Solo candidatos de partidos del grupo, con pick y cuota numérica > 1 """
+    ids = {str(m.get("id")) for m in shard}
+    out = []
+    for c in candidates:
+        if not isinstance(c, dict) or str(c.get("fixture_id")) not in ids or not c.get("pick"): continue
+        try:
+            odd = float(c.get("odd"))
+        except (TypeError, ValueError):
+            continue
+        if odd <= 1: continue
+        out.append({"fixture_id": c["fixture_id"], "pick": str(c["pick"]), "odd": round(odd, 2),
+                    "confidence": c.get("confidence"), "reason": " ".join(str(c.get("reason", "")).split())})
+    return out[:size]
+
+
+def _shortlist(rs, model, generation_config, system_instruction, shard, index, total, label):
+    name = _shard_name(shard)
+    size = int(os.getenv("ANALYSIS_SHORTLIST_SIZE", SHORTLIST_SIZE))
+    prompt = f"""
+{system_instruction}
+
+{SHORTLIST_INSTRUCTION.format(group=name, index=index, total=total, size=size)}
+
+INPUT DATA (MATCHES):
+{render_matches(shard, label=f"{label}-S{index}")}
+"""
+    for attempt in range(SHARD_RETRIES):
+        started = time.monotonic()
+        try:
+            text = rs.gemini_cache.generate(model, prompt, generation_config=generation_config, label=f"{label}-shard",
+                                            validate=json_response_ok, use_cache=(attempt == 0))
+            candidates = _clean_candidates(_parse_list(text), shard, size)
+            print(f"   [SHARD {index}/{total}] {name}: {len(shard)} matches -> {len(candidates)} candidates ({time.monotonic() - started:.1f}s)")
+            return candidates
+        except Exception as e:
+            print(f"   [SHARD {index}/{total}] Attempt {attempt + 1} failed ({name}): {e}")
+            time.sleep(2)
+    print(f"   [SHARD {index}/{total}] Giving up on {name}")
+    return None
+
+
+def build_final_prompt(rs, model, generation_config, system_instruction, matches, header, label="SHARDED"):
+    """
+    Ejecuta la fase map y devuelve el prompt de la fase final, o None si ningún grupo devolvió
+    candidatos (el analizador vuelve entonces al prompt único).
+    """
+    shards = shard_matches(matches)
+    workers = max(1, min(int(os.getenv("ANALYSIS_SHARD_WORKERS", SHARD_WORKERS)), len(shards)))
+    print(f"[{label}] Map-reduce: {len(matches)} matches in {len(shards)} shards ({workers} workers)")
+
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        shortlists = list(pool.map(
+            lambda item: _shortlist(rs, model, generation_config, system_instruction, item[1], item[0] + 1, len(shards), label),
+            enumerate(shards)))
+
+    failed = sum(1 for s in shortlists if s is None)
+    candidates = [c for s in shortlists if s for c in s]
+    print(f"[{label}] Map stage: {len(candidates)} candidates from {len(shards) - failed}/{len(shards)} shards in {time.monotonic() - started:.1f}s")
+    if not candidates:
+        return None
+
+    by_id = {str(m.get("id")): m for m in matches}
+    chosen = list(dict.fromkeys(str(c["fixture_id"]) for c in candidates))
+    heads = "\n".join(row_parts(by_id[fid], {})["head"] for fid in chosen if fid in by_id)
+    rows = "\n".join(
+        f"#{c['fixture_id']} | {c['pick']} | {c['odd']} | conf {c.get('confidence', '-')} | {c['reason']}" for c in candidates)
+
+    prompt = f"""
+{system_instruction}
+
+{FINAL_INSTRUCTION}
+
+{header}
+PARTIDOS PRESELECCIONADOS (#fixture_id hora | liga (país, jornada) | local vs visitante):
+{heads}
+
+CANDIDATOS (#fixture_id | pick | cuota | confianza | motivo):
+{rows}
+"""
+    print(f"[{label}] Final prompt: ~{estimate_tokens(prompt)} tokens ({len(chosen)} matches, {len(candidates)} candidates)")
+    return prompt
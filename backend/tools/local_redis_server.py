@@ -0,0 +1,771 @@
+"""
+Servidor local compatible con Upstash REST para ejecuciones offline y benchmarks.
+
+Habla el mismo protocolo HTTP que usa RedisService y el cliente @upstash/redis:
+  POST /            body: ["SET", "key", "value"]          -> {"result": "OK"}
+  POST /pipeline    body: [["GET", "a"], ["INCR", "b"]]     -> [{"result": ...}, ...]
+  POST /multi-exec  igual que /pipeline pero atómico
+  GET  /set/key/val (estilo path, útil con curl)
+  GET  /_stats      contadores de peticiones/comandos del servidor
+Con la cabecera "Upstash-Encoding: base64" (la que envía @upstash/redis por defecto) los resultados de
+tipo texto van en base64 como en Upstash ("OK", números y null tal cual; listas elemento a elemento).
+
+Almacenamiento en memoria con snapshot JSON periódico (--snapshot), TTLs y latencia artificial
+configurable (--latency-ms / --jitter-ms) aplicada una vez por round trip HTTP, para medir el coste
+real de los viajes a Redis de cada script.
+
+Uso:
+  python backend/tools/local_redis_server.py --port 8079 --latency-ms 40 --snapshot data/local_redis.json
+  REDIS_URL=http://127.0.0.1:8079 REDIS_TOKEN=local python main.py --mode fetch
+"""
+import os
+import sys
+import json
+import time
+import base64
+import math
+import random
+import signal
+import fnmatch
+import argparse
+import threading
+from urllib.parse import unquote
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class CommandError(Exception):
+    pass
+
+
+WRONGTYPE = "WRONGTYPE Operation against a key holding the wrong kind of value"
+
+
+def _fmt_float(value):
+    # Redis devuelve floats como texto sin ceros sobrantes ("1.5", "3")
+    if value == int(value) and abs(value) < 1e17:
+        return str(int(value))
+    return repr(float(value))
+
+
+def _parse_score_bound(raw):
+    raw = str(raw).lower()
+    exclusive = raw.startswith("(")
+    if exclusive:
+        raw = raw[1:]
+    if raw in ("-inf", "-infinity"):
+        return -math.inf, exclusive
+    if raw in ("+inf", "inf", "+infinity"):
+        return math.inf, exclusive
+    return float(raw), exclusive
+
+
+class MemoryStore:
+    """Keyspace en memoria: key -> (type, value). Tipos: string, hash, list, zset."""
+    def __init__(self, snapshot_path=None):
+        self.data = {}
+        self.expires = {}  # key -> epoch seconds
+        self.lock = threading.RLock()
+        self.snapshot_path = snapshot_path
+        self.dirty = False
+        self.version = 0   # nº de escrituras: save() solo limpia dirty si no hubo otra mientras escribía
+        if snapshot_path and os.path.exists(snapshot_path):
+            self.load()
+
+    # --- PERSISTENCIA ---
+    def load(self):
+        with open(self.snapshot_path, "r", encoding="utf-8") as f:
+            raw = json.load(f)
+        now = time.time()
+        for key, entry in raw.items():
+            exp = entry.get("expire_at")
+            if exp and exp <= now:
+                continue
+            self.data[key] = (entry["type"], entry["value"])
+            if exp:
+                self.expires[key] = exp
+        print(f"[LocalRedis] Snapshot cargado: {len(self.data)} claves desde {self.snapshot_path}")
+
+    def save(self):
+        if not self.snapshot_path:
+            return
+        # Serializa dentro del lock (los hash/list/zset son los objetos vivos); la escritura a disco va fuera
+        with self.lock:
+            if not self.dirty:
+                return
+            self._purge_expired()
+            text = json.dumps({key: {"type": t, "value": v, "expire_at": self.expires.get(key)}
+                               for key, (t, v) in self.data.items()}, ensure_ascii=False)
+            version = self.version
+        tmp = f"{self.snapshot_path}.tmp"
+        os.makedirs(os.path.dirname(os.path.abspath(self.snapshot_path)), exist_ok=True)
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp, self.snapshot_path)
+        with self.lock:
+            if self.version == version:
+                self.dirty = False
+
+    # --- KEYSPACE HELPERS ---
+    def _purge_expired(self):
+        now = time.time()
+        for key in [k for k, exp in self.expires.items() if exp <= now]:
+            self.data.pop(key, None)
+            self.expires.pop(key, None)
+
+    def _alive(self, key):
+        exp = self.expires.get(key)
+        if exp is not None and exp <= time.time():
+            self.data.pop(key, None)
+            self.expires.pop(key, None)
+        return key in self.data
+
+    def _get(self, key, expected_type):
+        if not self._alive(key):
+            return None
+        t, v = self.data[key]
+        if t != expected_type:
+            raise CommandError(WRONGTYPE)
+        return v
+
+    def _get_or_create(self, key, expected_type, factory):
+        v = self._get(key, expected_type)
+        if v is None:
+            v = factory()
+            self.data[key] = (expected_type, v)
+        return v
+
+    def _delete(self, key):
+        existed = self._alive(key)
+        self.data.pop(key, None)
+        self.expires.pop(key, None)
+        return existed
+
+    def _drop_if_empty(self, key):
+        t, v = self.data.get(key, (None, None))
+        if t in ("hash", "list", "zset") and not v:
+            self._delete(key)
+
+    def _sorted_keys(self, pattern=None, type_filter=None):
+        self._purge_expired()
+        keys = sorted(self.data.keys())
+        if pattern:
+            keys = [k for k in keys if fnmatch.fnmatchcase(k, pattern)]
+        if type_filter:
+            keys = [k for k in keys if self.data[k][0] == type_filter]
+        return keys
+
+    # --- DISPATCH ---
+    def execute(self, cmd):
+        if not isinstance(cmd, list) or not cmd:
+            raise CommandError("ERR invalid command format")
+        name = str(cmd[0]).upper()
+        args = ["" if a is None else (a if isinstance(a, str) else json.dumps(a) if isinstance(a, (dict, list)) else str(a)) for a in cmd[1:]]
+        handler = getattr(self, f"cmd_{name}", None)
+        if not handler:
+            raise CommandError(f"ERR unknown command '{name}'")
+        with self.lock:
+            result = handler(*args)
+            if name not in READ_ONLY:
+                self.dirty = True
+                self.version += 1
+            return result
+
+    # --- GENERIC ---
+    def cmd_PING(self, *args):
+        return args[0] if args else "PONG"
+
+    def cmd_ECHO(self, msg):
+        return msg
+
+    def cmd_DEL(self, *keys):
+        return sum(1 for k in keys if self._delete(k))
+
+    cmd_UNLINK = cmd_DEL
+
+    def cmd_EXISTS(self, *keys):
+        return sum(1 for k in keys if self._alive(k))
+
+    def cmd_TYPE(self, key):
+        return self.data[key][0] if self._alive(key) else "none"
+
+    def cmd_EXPIRE(self, key, seconds):
+        if not self._alive(key):
+            return 0
+        self.expires[key] = time.time() + int(seconds)
+        return 1
+
+    def cmd_EXPIREAT(self, key, timestamp):
+        if not self._alive(key):
+            return 0
+        self.expires[key] = float(timestamp)
+        return 1
+
+    def cmd_PEXPIRE(self, key, ms):
+        if not self._alive(key):
+            return 0
+        self.expires[key] = time.time() + int(ms) / 1000.0
+        return 1
+
+    # --- SCRIPTING (sin intérprete Lua: solo los scripts compare-and-* de src/services/run_lock.py) ---
+    def cmd_EVAL(self, script, numkeys, *args):
+        keys, argv = args[:int(numkeys)], args[int(numkeys):]
+        guarded = "redis.call('get', KEYS[1]) == ARGV[1]" in script
+        if guarded and "redis.call('del', KEYS[1])" in script:
+            return self.cmd_DEL(keys[0]) if self.cmd_GET(keys[0]) == argv[0] else 0
+        if guarded and "redis.call('pexpire', KEYS[1], ARGV[2])" in script:
+            return self.cmd_PEXPIRE(keys[0], argv[1]) if self.cmd_GET(keys[0]) == argv[0] else 0
+        raise CommandError("ERR EVAL: only the lock compare-and-delete / compare-and-pexpire scripts are emulated")
+
+    def cmd_PERSIST(self, key):
+        return 1 if self._alive(key) and self.expires.pop(key, None) is not None else 0
+
+    def cmd_TTL(self, key):
+        if not self._alive(key):
+            return -2
+        exp = self.expires.get(key)
+        return -1 if exp is None else max(0, int(round(exp - time.time())))
+
+    def cmd_PTTL(self, key):
+        if not self._alive(key):
+            return -2
+        exp = self.expires.get(key)
+        return -1 if exp is None else max(0, int((exp - time.time()) * 1000))
+
+    def cmd_KEYS(self, pattern):
+        return self._sorted_keys(pattern)
+
+    def cmd_SCAN(self, cursor, *opts):
+        pattern, count, type_filter = None, 10, None
+        opts = list(opts)
+        while opts:
+            opt = opts.pop(0).upper()
+            if opt == "MATCH": pattern = opts.pop(0)
+            elif opt == "COUNT": count = int(opts.pop(0))
+            elif opt == "TYPE": type_filter = opts.pop(0).lower()
+        # Cursor = índice sobre el keyspace ordenado (estable entre páginas si no hay escrituras)
+        all_keys = self._sorted_keys()
+        start = int(cursor)
+        page = all_keys[start:start + count]
+        nxt = start + count
+        if nxt >= len(all_keys):
+            nxt = 0
+        if pattern:
+            page = [k for k in page if fnmatch.fnmatchcase(k, pattern)]
+        if type_filter:
+            page = [k for k in page if self.data[k][0] == type_filter]
+        return [str(nxt), page]
+
+    def cmd_DBSIZE(self):
+        self._purge_expired()
+        return len(self.data)
+
+    def cmd_FLUSHDB(self, *args):
+        self.data.clear()
+        self.expires.clear()
+        return "OK"
+
+    cmd_FLUSHALL = cmd_FLUSHDB
+
+    # --- STRINGS ---
+    def cmd_GET(self, key):
+        return self._get(key, "string")
+
+    def cmd_SET(self, key, value, *opts):
+        ttl, nx, xx, keepttl, get = None, False, False, False, False
+        i = 0
+        while i < len(opts):
+            opt = str(opts[i]).upper()
+            if opt == "EX": ttl = int(opts[i + 1]); i += 1
+            elif opt == "PX": ttl = int(opts[i + 1]) / 1000.0; i += 1
+            elif opt == "EXAT": ttl = int(opts[i + 1]) - time.time(); i += 1
+            elif opt == "PXAT": ttl = int(opts[i + 1]) / 1000.0 - time.time(); i += 1
+            elif opt == "NX": nx = True
+            elif opt == "XX": xx = True
+            elif opt == "KEEPTTL": keepttl = True
+            elif opt == "GET": get = True
+            i += 1
+
+        exists = self._alive(key)
+        old = None
+        if get and exists:
+            old = self._get(key, "string")
+        if (nx and exists) or (xx and not exists):
+            return old if get else None
+
+        prev_exp = self.expires.get(key)
+        self._delete(key)
+        self.data[key] = ("string", value)
+        if ttl is not None:
+            self.expires[key] = time.time() + ttl
+        elif keepttl and prev_exp:
+            self.expires[key] = prev_exp
+        return old if get else "OK"
+
+    def cmd_SETNX(self, key, value):
+        return 1 if self.cmd_SET(key, value, "NX") == "OK" else 0
+
+    def cmd_SETEX(self, key, seconds, value):
+        return self.cmd_SET(key, value, "EX", seconds)
+
+    def cmd_MGET(self, *keys):
+        out = []
+        for k in keys:
+            try: out.append(self._get(k, "string"))
+            except CommandError: out.append(None)
+        return out
+
+    def cmd_MSET(self, *pairs):
+        for i in range(0, len(pairs) - 1, 2):
+            self.cmd_SET(pairs[i], pairs[i + 1])
+        return "OK"
+
+    def cmd_INCRBY(self, key, amount):
+        current = self._get(key, "string")
+        try:
+            value = int(current or 0) + int(amount)
+        except ValueError:
+            raise CommandError("ERR value is not an integer or out of range")
+        exp = self.expires.get(key)
+        self.data[key] = ("string", str(value))
+        if exp: self.expires[key] = exp
+        return value
+
+    def cmd_INCR(self, key):
+        return self.cmd_INCRBY(key, 1)
+
+    def cmd_DECR(self, key):
+        return self.cmd_INCRBY(key, -1)
+
+    def cmd_DECRBY(self, key, amount):
+        return self.cmd_INCRBY(key, -int(amount))
+
+    def cmd_INCRBYFLOAT(self, key, amount):
+        current = self._get(key, "string")
+        value = float(current or 0) + float(amount)
+        exp = self.expires.get(key)
+        self.data[key] = ("string", _fmt_float(value))
+        if exp: self.expires[key] = exp
+        return _fmt_float(value)
+
+    # --- HASHES ---
+    def cmd_HSET(self, key, *pairs):
+        if len(pairs) < 2 or len(pairs) % 2:
+            raise CommandError("ERR wrong number of arguments for 'hset' command")
+        h = self._get_or_create(key, "hash", dict)
+        added = 0
+        for i in range(0, len(pairs), 2):
+            if pairs[i] not in h: added += 1
+            h[pairs[i]] = pairs[i + 1]
+        return added
+
+    def cmd_HMSET(self, key, *pairs):
+        self.cmd_HSET(key, *pairs)
+        return "OK"
+
+    def cmd_HSETNX(self, key, field, value):
+        h = self._get_or_create(key, "hash", dict)
+        if field in h:
+            return 0
+        h[field] = value
+        return 1
+
+    def cmd_HGET(self, key, field):
+        h = self._get(key, "hash")
+        return h.get(field) if h else None
+
+    def cmd_HMGET(self, key, *fields):
+        h = self._get(key, "hash") or {}
+        return [h.get(f) for f in fields]
+
+    def cmd_HGETALL(self, key):
+        h = self._get(key, "hash") or {}
+        out = []
+        for f, v in h.items():
+            out.extend([f, v])
+        return out
+
+    def cmd_HKEYS(self, key):
+        return list((self._get(key, "hash") or {}).keys())
+
+    def cmd_HVALS(self, key):
+        return list((self._get(key, "hash") or {}).values())
+
+    def cmd_HLEN(self, key):
+        return len(self._get(key, "hash") or {})
+
+    def cmd_HEXISTS(self, key, field):
+        return 1 if field in (self._get(key, "hash") or {}) else 0
+
+    def cmd_HDEL(self, key, *fields):
+        h = self._get(key, "hash")
+        if not h:
+            return 0
+        removed = sum(1 for f in fields if h.pop(f, None) is not None)
+        self._drop_if_empty(key)
+        return removed
+
+    def cmd_HINCRBY(self, key, field, amount):
+        h = self._get_or_create(key, "hash", dict)
+        try:
+            value = int(h.get(field) or 0) + int(amount)
+        except ValueError:
+            raise CommandError("ERR hash value is not an integer")
+        h[field] = str(value)
+        return value
+
+    def cmd_HINCRBYFLOAT(self, key, field, amount):
+        h = self._get_or_create(key, "hash", dict)
+        value = float(h.get(field) or 0) + float(amount)
+        h[field] = _fmt_float(value)
+        return h[field]
+
+    def cmd_HSCAN(self, key, cursor, *opts):
+        pattern, count = None, 10
+        opts = list(opts)
+        while opts:
+            opt = opts.pop(0).upper()
+            if opt == "MATCH": pattern = opts.pop(0)
+            elif opt == "COUNT": count = int(opts.pop(0))
+        h = self._get(key, "hash") or {}
+        fields = sorted(h.keys())
+        start = int(cursor)
+        page = fields[start:start + count]
+        nxt = start + count
+        if nxt >= len(fields):
+            nxt = 0
+        out = []
+        for f in page:
+            if pattern and not fnmatch.fnmatchcase(f, pattern):
+                continue
+            out.extend([f, h[f]])
+        return [str(nxt), out]
+
+    # --- LISTS ---
+    def cmd_RPUSH(self, key, *values):
+        lst = self._get_or_create(key, "list", list)
+        lst.extend(values)
+        return len(lst)
+
+    def cmd_LPUSH(self, key, *values):
+        lst = self._get_or_create(key, "list", list)
+        for v in values:
+            lst.insert(0, v)
+        return len(lst)
+
+    def _norm_range(self, length, start, stop):
+        start, stop = int(start), int(stop)
+        if start < 0: start = max(0, length + start)
+        if stop < 0: stop = length + stop
+        return start, min(stop, length - 1)
+
+    def cmd_LRANGE(self, key, start, stop):
+        lst = self._get(key, "list") or []
+        s, e = self._norm_range(len(lst), start, stop)
+        return lst[s:e + 1] if s <= e else []
+
+    def cmd_LTRIM(self, key, start, stop):
+        lst = self._get(key, "list")
+        if lst is None:
+            return "OK"
+        s, e = self._norm_range(len(lst), start, stop)
+        lst[:] = lst[s:e + 1] if s <= e else []
+        self._drop_if_empty(key)
+        return "OK"
+
+    def cmd_LLEN(self, key):
+        return len(self._get(key, "list") or [])
+
+    def cmd_LINDEX(self, key, index):
+        lst = self._get(key, "list") or []
+        try: return lst[int(index)]
+        except IndexError: return None
+
+    def cmd_LPOP(self, key):
+        lst = self._get(key, "list")
+        if not lst: return None
+        v = lst.pop(0)
+        self._drop_if_empty(key)
+        return v
+
+    def cmd_RPOP(self, key):
+        lst = self._get(key, "list")
+        if not lst: return None
+        v = lst.pop()
+        self._drop_if_empty(key)
+        return v
+
+    # --- SORTED SETS ---
+    def cmd_ZADD(self, key, *args):
+        args = list(args)
+        nx = xx = False
+        while args and str(args[0]).upper() in ("NX", "XX", "CH", "GT", "LT"):
+            flag = str(args.pop(0)).upper()
+            if flag == "NX": nx = True
+            if flag == "XX": xx = True
+        z = self._get_or_create(key, "zset", dict)
+        added = 0
+        for i in range(0, len(args) - 1, 2):
+            score, member = float(args[i]), args[i + 1]
+            if nx and member in z: continue
+            if xx and member not in z: continue
+            if member not in z: added += 1
+            z[member] = score
+        self._drop_if_empty(key)
+        return added
+
+    def cmd_ZREM(self, key, *members):
+        z = self._get(key, "zset")
+        if not z: return 0
+        removed = sum(1 for m in members if z.pop(m, None) is not None)
+        self._drop_if_empty(key)
+        return removed
+
+    def cmd_ZSCORE(self, key, member):
+        z = self._get(key, "zset") or {}
+        return _fmt_float(z[member]) if member in z else None
+
+    def cmd_ZCARD(self, key):
+        return len(self._get(key, "zset") or {})
+
+    def _zsorted(self, z):
+        return sorted(z.items(), key=lambda kv: (kv[1], kv[0]))
+
+    def _zfilter(self, z, lo, hi):
+        (mn, mn_ex), (mx, mx_ex) = _parse_score_bound(lo), _parse_score_bound(hi)
+        out = []
+        for member, score in self._zsorted(z):
+            if score < mn or (mn_ex and score == mn): continue
+            if score > mx or (mx_ex and score == mx): continue
+            out.append((member, score))
+        return out
+
+    def _zreply(self, items, withscores):
+        if not withscores:
+            return [m for m, _ in items]
+        out = []
+        for m, s in items:
+            out.extend([m, _fmt_float(s)])
+        return out
+
+    def cmd_ZRANGEBYSCORE(self, key, lo, hi, *opts):
+        z = self._get(key, "zset") or {}
+        opts = [str(o).upper() for o in opts]
+        items = self._zfilter(z, lo, hi)
+        if "LIMIT" in opts:
+            i = opts.index("LIMIT")
+            offset, count = int(opts[i + 1]), int(opts[i + 2])
+            items = items[offset:] if count < 0 else items[offset:offset + count]
+        return self._zreply(items, "WITHSCORES" in opts)
+
+    def cmd_ZRANGE(self, key, start, stop, *opts):
+        z = self._get(key, "zset") or {}
+        upper = [str(o).upper() for o in opts]
+        if "BYSCORE" in upper:
+            rest = [o for o in opts if str(o).upper() != "BYSCORE"]
+            return self.cmd_ZRANGEBYSCORE(key, start, stop, *rest)
+        items = self._zsorted(z)
+        if "REV" in upper:
+            items = items[::-1]
+        s, e = self._norm_range(len(items), start, stop)
+        return self._zreply(items[s:e + 1] if s <= e else [], "WITHSCORES" in upper)
+
+    def cmd_ZREMRANGEBYSCORE(self, key, lo, hi):
+        z = self._get(key, "zset")
+        if not z: return 0
+        doomed = [m for m, _ in self._zfilter(z, lo, hi)]
+        for m in doomed:
+            z.pop(m, None)
+        self._drop_if_empty(key)
+        return len(doomed)
+
+
+READ_ONLY = {
+    "PING", "ECHO", "EXISTS", "TYPE", "TTL", "PTTL", "KEYS", "SCAN", "DBSIZE", "GET", "MGET",
+    "HGET", "HMGET", "HGETALL", "HKEYS", "HVALS", "HLEN", "HEXISTS", "HSCAN",
+    "LRANGE", "LLEN", "LINDEX", "ZSCORE", "ZCARD", "ZRANGEBYSCORE", "ZRANGE",
+}
+
+
+class ServerStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.commands = {}
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def record(self, cmds, bytes_in, bytes_out):
+        with self.lock:
+            self.requests += 1
+            self.bytes_in += bytes_in
+            self.bytes_out += bytes_out
+            for c in cmds:
+                name = str(c[0]).upper() if isinstance(c, list) and c else "?"
+                self.commands[name] = self.commands.get(name, 0) + 1
+
+    def as_dict(self):
+        with self.lock:
+            return {
+                "requests": self.requests,
+                "commands": dict(sorted(self.commands.items(), key=lambda kv: -kv[1])),
+                "bytes_in": self.bytes_in,
+                "bytes_out": self.bytes_out,
+            }
+
+
+def encode_base64(value):
+    """ Resultado en el formato de Upstash-Encoding: base64 (lo que decodifica @upstash/redis) """
+    if isinstance(value, str):
+        return value if value == "OK" else base64.b64encode(value.encode("utf-8")).decode("ascii")
+    if isinstance(value, list):
+        return [encode_base64(v) for v in value]
+    return value
+
+
+def make_handler(store, stats, token=None, latency_ms=0.0, jitter_ms=0.0):
+    class UpstashHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, fmt, *args):
+            pass  # silencioso: los scripts ya imprimen bastante
+
+        def _authorized(self):
+            if not token:
+                return True
+            auth = self.headers.get("Authorization", "")
+            return auth == f"Bearer {token}"
+
+        def _send(self, status, payload):
+            body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return len(body)
+
+        def _delay(self):
+            if latency_ms or jitter_ms:
+                time.sleep(max(0.0, latency_ms + random.uniform(-jitter_ms, jitter_ms)) / 1000.0)
+
+        def _base64(self):
+            return self.headers.get("Upstash-Encoding", "").lower() == "base64"
+
+        def _run_one(self, cmd):
+            try:
+                result = store.execute(cmd)
+                return {"result": encode_base64(result) if self._base64() else result}
+            except CommandError as e:
+                return {"error": str(e)}
+            except Exception as e:
+                return {"error": f"ERR {e}"}
+
+        def do_GET(self):
+            if self.path.rstrip("/") == "/_stats":
+                self._send(200, stats.as_dict())
+                return
+            if not self._authorized():
+                self._send(401, {"error": "Unauthorized"})
+                return
+            # Estilo path de Upstash: /set/key/value
+            parts = [unquote(p) for p in self.path.split("?")[0].strip("/").split("/") if p]
+            if not parts:
+                self._send(400, {"error": "ERR empty command"})
+                return
+            self._delay()
+            reply = self._run_one(parts)
+            out = self._send(400 if "error" in reply else 200, reply)
+            stats.record([parts], 0, out)
+
+        def do_POST(self):
+            if not self._authorized():
+                self._send(401, {"error": "Unauthorized"})
+                return
+            length = int(self.headers.get("Content-Length") or 0)
+            raw = self.rfile.read(length) if length else b""
+            try:
+                body = json.loads(raw.decode("utf-8") or "null")
+            except ValueError:
+                self._send(400, {"error": "ERR invalid JSON body"})
+                return
+
+            self._delay()
+            route = self.path.split("?")[0].rstrip("/")
+            if route in ("/pipeline", "/multi-exec"):
+                if not isinstance(body, list) or not all(isinstance(c, list) for c in body):
+                    self._send(400, {"error": "ERR pipeline body must be an array of commands"})
+                    return
+                if route == "/multi-exec":
+                    with store.lock:
+                        replies = [self._run_one(c) for c in body]
+                else:
+                    replies = [self._run_one(c) for c in body]
+                out = self._send(200, replies)
+                stats.record(body, len(raw), out)
+                return
+
+            if route not in ("",):
+                # Estilo path con argumentos extra en el body: POST /set/key  body: "value"
+                parts = [unquote(p) for p in route.strip("/").split("/") if p]
+                cmd = parts + ([body] if body is not None else [])
+            else:
+                cmd = body
+            reply = self._run_one(cmd)
+            out = self._send(400 if "error" in reply else 200, reply)
+            stats.record([cmd], len(raw), out)
+
+    return UpstashHandler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stand-in local de Upstash Redis (REST) para ejecuciones offline y benchmarks")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8079)
+    parser.add_argument("--token", default=os.getenv("REDIS_TOKEN"), help="Bearer token exigido (por defecto REDIS_TOKEN; vacío = sin auth)")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Latencia artificial por round trip HTTP")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Variación aleatoria +/- sobre la latencia")
+    parser.add_argument("--snapshot", default=None, help="Fichero JSON para persistir el keyspace entre ejecuciones")
+    parser.add_argument("--snapshot-every", type=float, default=5.0, help="Segundos entre snapshots (si hay cambios)")
+    args = parser.parse_args()
+
+    store = MemoryStore(args.snapshot)
+    stats = ServerStats()
+    handler = make_handler(store, stats, token=args.token, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms)
+    server = ThreadingHTTPServer((args.host, args.port), handler)
+    server.daemon_threads = True
+
+    stop = threading.Event()
+
+    def snapshot_loop():
+        while not stop.wait(args.snapshot_every):
+            try:
+                store.save()
+            except Exception as e:
+                print(f"[LocalRedis] Error guardando snapshot: {e}")
+
+    if args.snapshot:
+        threading.Thread(target=snapshot_loop, daemon=True).start()
+
+    def _interrupt(signum, frame):
+        raise KeyboardInterrupt
+
+    # Cierre limpio (snapshot final + stats) también con SIGTERM o si arrancamos en background
+    signal.signal(signal.SIGTERM, _interrupt)
+    signal.signal(signal.SIGINT, _interrupt)
+
+    print(f"[LocalRedis] Escuchando en http://{args.host}:{args.port} "
+          f"(latencia {args.latency_ms}ms ±{args.jitter_ms}ms, auth={'on' if args.token else 'off'}, snapshot={args.snapshot or 'off'})")
+    print(f"[LocalRedis] export REDIS_URL=http://{args.host}:{args.port} REDIS_TOKEN={args.token or 'local'}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        server.server_close()
+        store.save()
+        print(f"[LocalRedis] Stats: {json.dumps(stats.as_dict())}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,28 @@
+import sys
+import os
+import re
+
+# Add backend root to path (bet-ai-master/backend)
+sys.path.append(os.path.join(os.path.dirname(__file__), '../'))
+
+from src.services.redis_service import RedisService
+from src.services.check_api_results import BlacklistManager, LEGACY_BLACKLIST_FIELD
+
+# Moves every legacy ID_RESULT_FAILED field out of the monthly bet hashes into blacklist:{category}:{YYYY-MM}.
+# The checker migrates the months it reads on its own; this clears the rest of the history in one go.
+
+if __name__ == "__main__":
+    print("--- BLACKLIST MIGRATION ---")
+    rs = RedisService()
+    if not rs.is_active:
+        print("FATAL: Redis not active.")
+        sys.exit(1)
+
+    total = 0
+    for category in ["daily_bets", "daily_bets_stakazo"]:
+        manager = BlacklistManager(rs, category=category)
+        for key in rs.scan_iter(f"{category}:*"):
+            m = re.search(r":(\d{4}-\d{2})$", key)
+            if not m: continue
+            total += len(manager.migrate_legacy(m.group(1)))
+    print(f"Done. {total} entries moved out of {LEGACY_BLACKLIST_FIELD}.")
@@ -0,0 +1,160 @@
+"""
+Re-liquida todo el histórico con el motor de liquidación (settlement_engine) usando los resultados
+guardados en results:{sport}. No llama a la API ni escribe nada: compara contra lo guardado y mide tiempos.
+
+Cobertura: solo se re-liquidan las selecciones cuyo fixture está en results:{sport}, que se rellena desde que
+existe el ResultStore. Lo liquidado antes (sin resultado guardado) se cuenta como "sin resultado guardado" y no se compara.
+--verify compara el motor con settle_spec; la equivalencia con las reglas del check_bets original la cubre
+test_settlement_engine.py (raíz del repo).
+
+  python tools/recheck_history.py                      # todas las categorías y meses
+  python tools/recheck_history.py --months 2026-01 2026-02 --category daily_bets
+  python tools/recheck_history.py --verify             # además compara motor vs settle_spec fila a fila
+"""
+import sys
+import os
+import re
+import json
+import time
+import argparse
+
+# Add backend root to path (bet-ai-master/backend)
+sys.path.append(os.path.join(os.path.dirname(__file__), '../'))
+
+from src.services.redis_service import RedisService
+from src.services.result_store import ResultStore
+from src.services.pick_compiler import compile_selection
+from src.services.pick_settlement import settle_spec
+from src.services.settlement_engine import settle_rows, aggregate_bets, NUMPY_AVAILABLE
+from src.services.check_api_results import find_player_in_stats
+
+
+CATEGORIES = ["daily_bets", "daily_bets_stakazo"]
+CLOSED_SELECTION = ["WON", "LOST", "PUSH", "VOID", "NULA"]
+
+
+def find_months(rs, category):
+    months = set()
+    for key in rs.scan_iter(f"{category}:*"):
+        m = re.search(r":(\d{4}-\d{2})$", key)
+        if m: months.add(m.group(1))
+    return sorted(months)
+
+
+def load_documents(rs, categories, months=None):
+    documents = []
+    for category in categories:
+        for month in (months or find_months(rs, category)):
+            for date_str, raw in rs.iter_month_bets(month, category=category):
+                try:
+                    day_data = json.loads(raw) if isinstance(raw, str) else raw
+                except Exception as e:
+                    print(f"   - Error parsing {category} {date_str}: {e}")
+                    continue
+                if isinstance(day_data, dict) and day_data.get("bets"):
+                    documents.append((date_str, category, day_data))
+    return sorted(documents, key=lambda d: (d[1], d[0]))
+
+
+def load_results(rs, documents):
+    wanted = {}
+    for _, _, day_data in documents:
+        for bet in day_data["bets"]:
+            for sel in bet.get("selections", []) or []:
+                fid = sel.get("fixture_id")
+                if fid:
+                    wanted.setdefault(sel.get("sport", "football").lower(), set()).add(str(fid).replace("_stakazo", ""))
+    store = ResultStore(rs)
+    return {sport: store.get_many(sport, sorted(ids)) for sport, ids in wanted.items()}
+
+
+def recheck(rs, categories, months=None, verify=False):
+    t0 = time.perf_counter()
+    documents = load_documents(rs, categories, months)
+    results = load_results(rs, documents)
+    load_ms = (time.perf_counter() - t0) * 1000
+
+    rows, refs, bets = [], [], []
+    no_result = 0
+    for date_str, category, day_data in documents:
+        for bet in day_data["bets"]:
+            if bet.get("status") == "MANUAL_CHECK": continue
+            selections = bet.get("selections", []) or []
+            states = [sel.get("status") if sel.get("status") in CLOSED_SELECTION else "PENDING" for sel in selections]
+            bets.append((date_str, category, bet, selections, states))
+            for j, sel in enumerate(selections):
+                sport = sel.get("sport", "football").lower()
+                data = results.get(sport, {}).get(str(sel.get("fixture_id")).replace("_stakazo", ""))
+                if not data:
+                    no_result += 1
+                    continue
+                players = data.get("players")
+                rows.append((compile_selection(sel), data, sport, lambda p, players=players: find_player_in_stats(p, players)))
+                refs.append((states, j, date_str, category, sel))
+
+    t1 = time.perf_counter()
+    settled = settle_rows(rows)
+    settle_ms = (time.perf_counter() - t1) * 1000
+
+    sel_diffs = []
+    for (states, j, date_str, category, sel), (status, result_str, _) in zip(refs, settled):
+        if status not in ("WON", "LOST", "VOID"): continue
+        stored = sel.get("status")
+        if stored in CLOSED_SELECTION and (stored, sel.get("result")) != (status, result_str):
+            sel_diffs.append((date_str, category, sel.get("match"), sel.get("pick"), f"{stored} ({sel.get('result')})", f"{status} ({result_str})"))
+        states[j] = status
+
+    t2 = time.perf_counter()
+    outcomes = aggregate_bets([
+        (bet.get("stake", 0), [(st, sel.get("odd", 1.0)) for st, sel in zip(states, selections)])
+        for _, _, bet, selections, states in bets
+    ])
+    aggregate_ms = (time.perf_counter() - t2) * 1000
+
+    bet_diffs = []
+    for (date_str, category, bet, _, _), (status, profit) in zip(bets, outcomes):
+        if status is None: continue
+        if status != bet.get("status") or round(profit, 2) != round(bet.get("profit") or 0, 2):
+            bet_diffs.append((date_str, category, bet.get("betType"), f"{bet.get('status')} {bet.get('profit')}", f"{status} {profit}"))
+
+    print(f"[RECHECK] {len(documents)} documentos, {len(bets)} apuestas, {len(rows)} selecciones con resultado guardado (numpy={NUMPY_AVAILABLE})")
+    if no_result:
+        print(f"[RECHECK] {no_result} selecciones sin resultado guardado en results:{{sport}} (anteriores al ResultStore): no se comparan")
+    print(f"[RECHECK] Carga {load_ms:.0f}ms | liquidación {settle_ms:.1f}ms | agregado {aggregate_ms:.1f}ms")
+    print(f"[RECHECK] Selecciones distintas a lo guardado: {len(sel_diffs)}")
+    for d in sel_diffs[:50]:
+        print(f"   - {d[0]} [{d[1]}] {d[2]} | {d[3]}: {d[4]} -> {d[5]}")
+    print(f"[RECHECK] Apuestas distintas a lo guardado: {len(bet_diffs)}")
+    for d in bet_diffs[:50]:
+        print(f"   - {d[0]} [{d[1]}] {d[2]}: {d[3]} -> {d[4]}")
+
+    mismatches = 0
+    if verify:
+        # Motor vectorizado vs liquidación fila a fila (mismo resultado exacto esperado)
+        for row, got in zip(rows, settled):
+            spec, data, sport, resolve_player = row
+            try:
+                expected = settle_spec(spec, dict(data), sport, resolve_player)
+            except Exception as e:
+                expected = ("ERROR", str(e), "ERROR")
+            if expected != got:
+                mismatches += 1
+                if mismatches <= 20:
+                    print(f"   [VERIFY] {spec.get('pick')}: settle_spec={expected} engine={got}")
+        print(f"[VERIFY] {len(rows)} filas, {mismatches} diferencias motor vs settle_spec")
+    return mismatches
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-liquida el histórico con el motor vectorizado (solo lectura)")
+    parser.add_argument("--category", choices=CATEGORIES, help="Solo una categoría (por defecto, todas)")
+    parser.add_argument("--months", nargs="*", help="Meses YYYY-MM (por defecto, todos los encontrados)")
+    parser.add_argument("--verify", action="store_true", help="Comparar motor vs settle_spec fila a fila")
+    args = parser.parse_args()
+
+    print("--- HISTORY RE-CHECK ---")
+    rs = RedisService()
+    if not rs.is_active:
+        print("FATAL: Redis not active.")
+        sys.exit(1)
+    sys.exit(1 if recheck(rs, [args.category] if args.category else CATEGORIES, args.months, args.verify) else 0)
@@ -58,6 +58,7 @@ def reset_bet_status(match_query, date_str=None):
 
     if modified:
         rs.set_data(key, data)
+        rs.due_index.index_day("daily_bets", date_str, data)
         print("[SUCCESS] Redis actualizado correctamente.")
     elif not found:
         print(f"[!] No se encontró ningún partido que contenga '{match_query}'")
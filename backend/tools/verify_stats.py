@@ -0,0 +1,93 @@
+import sys
+import os
+import argparse
+from datetime import datetime
+
+# Add backend root to path (bet-ai-master/backend)
+sys.path.append(os.path.join(os.path.dirname(__file__), '../'))
+
+from src.services.redis_service import RedisService
+from src.services.stats_engine import StatsEngine, StatsViews, STATS_CATEGORIES, render_stats, render_views
+
+# Compares the incremental monthly aggregates (stats_agg:{category}:{YYYY-MM}) with a full
+# recalculation from the day documents, and the all-history ledger behind stats_views:{category} (--views).
+# --fix rebuilds the aggregates when they differ.
+
+
+def diff(a, b, path=""):
+    """ Paths where two rendered stats objects differ (last_updated ignored) """
+    if isinstance(a, dict) and isinstance(b, dict):
+        out = []
+        for k in sorted(set(a) | set(b)):
+            if k == "last_updated": continue
+            out.extend(diff(a.get(k), b.get(k), f"{path}.{k}" if path else k))
+        return out
+    if isinstance(a, list) and isinstance(b, list) and len(a) == len(b):
+        out = []
+        for i, (x, y) in enumerate(zip(a, b)):
+            out.extend(diff(x, y, f"{path}[{i}]"))
+        return out
+    return [] if a == b else [(path, a, b)]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Verify incremental monthly stats against a full rebuild")
+    parser.add_argument("--month", default=datetime.now().strftime("%Y-%m"), help="YYYY-MM (default: current month)")
+    parser.add_argument("--category", choices=STATS_CATEGORIES, help="Only one category (default: all)")
+    parser.add_argument("--views", action="store_true", help="Also verify the ledger behind the rolling/all-time views (reads every month)")
+    parser.add_argument("--fix", action="store_true", help="Rebuild the aggregates when they differ")
+    args = parser.parse_args()
+
+    print(f"--- STATS VERIFY ({args.month}) ---")
+    rs = RedisService()
+    if not rs.is_active:
+        print("FATAL: Redis not active.")
+        sys.exit(1)
+
+    failures = 0
+    for category in ([args.category] if args.category else STATS_CATEGORIES):
+        engine = StatsEngine(rs, category=category)
+        built, totals, days, dirty = engine.load(args.month)
+        full_totals, full_days = engine.rebuild(args.month, write=False)
+        if not built:
+            print(f"[{category}] No aggregates yet (built on the next checker run)")
+            continue
+
+        diffs = diff(render_stats(totals, sorted(days.items())), render_stats(full_totals, sorted(full_days.items())))
+        if dirty:
+            print(f"[{category}] {len(dirty)} edited days pending re-read: {', '.join(dirty)}")
+        if not diffs:
+            print(f"[{category}] OK ({len(days)} days)")
+            continue
+
+        failures += 1
+        print(f"[{category}] {len(diffs)} differences (incremental vs rebuild):")
+        for path, a, b in diffs[:30]:
+            print(f"   - {path}: {a} vs {b}")
+        if args.fix:
+            engine.rebuild(args.month)
+
+    for category in ([args.category] if args.category else STATS_CATEGORIES) if args.views else []:
+        views = StatsViews(rs, category=category)
+        built, days, dirty = views.load()
+        if not built:
+            print(f"[{category}] No ledger yet (built on the next checker run)")
+            continue
+        full_days = views.rebuild(write=False)
+        if dirty:
+            print(f"[{category}] {len(dirty)} edited days pending re-read in the ledger: {', '.join(dirty)}")
+
+        diffs = diff(render_views(days), render_views(full_days))
+        if not diffs:
+            print(f"[{category}] Views OK ({len(days)} days in ledger)")
+            continue
+
+        failures += 1
+        print(f"[{category}] {len(diffs)} view differences (ledger vs rebuild):")
+        for path, a, b in diffs[:30]:
+            print(f"   - {path}: {a} vs {b}")
+        if args.fix:
+            views.rebuild()
+            views.publish()
+
+    sys.exit(1 if failures and not args.fix else 0)
@@ -1441,7 +1441,7 @@ export default function AdminGuard({ children, predictions, formattedDate, rawDa
                                                                                     </span>
                                                                                 </td>
                                                                                 <td className="p-3 text-right max-w-[200px] hidden md:table-cell align-top">
-                                                                                    <span className="text-[10px] text-white/40 truncate block" title={log.message}>{log.message}</span>
+                                                                                    <span className="text-[10px] text-white/40 truncate block" title={log.message}>{log.message}{log.count > 1 && <span className="text-white/25"> ×{log.count}</span>}</span>
                                                                                 </td>
                                                                             </tr>
                                                                         );
@@ -1,35 +1,54 @@
 import { NextRequest, NextResponse } from 'next/server';
 import { Redis } from '@upstash/redis';
 
-// Initialize Redis 
+// Initialize Redis
 const redis = new Redis({
     url: process.env.UPSTASH_REDIS_REST_URL!,
     token: process.env.UPSTASH_REDIS_REST_TOKEN!,
 });
 
-export async function GET(req: NextRequest) {
-    try {
-        const { searchParams } = new URL(req.url);
-        let month = searchParams.get('month');
+// Blacklist: HASH betai:blacklist:{category}:{YYYY-MM} -> field = composite id, value = JSON entry (expires by month)
+// Legacy: JSON blob in field ID_RESULT_FAILED of betai:{category}:{YYYY-MM} (migrated by the checker)
+const LEGACY_FIELD = "ID_RESULT_FAILED";
 
-        if (!month) {
-            // Default to current month YYYY-MM
-            const now = new Date();
-            month = `${now.getFullYear()}-${(now.getMonth() + 1).toString().padStart(2, '0')}`;
-        }
+function resolveParams(req: NextRequest) {
+    const { searchParams } = new URL(req.url);
+    let month = searchParams.get('month');
+    const category = searchParams.get('category') || 'daily_bets';
+
+    if (!month) {
+        // Default to current month YYYY-MM
+        const now = new Date();
+        month = `${now.getFullYear()}-${(now.getMonth() + 1).toString().padStart(2, '0')}`;
+    }
 
-        const hashKey = `betai:daily_bets:${month}`;
-        const fieldName = "ID_RESULT_FAILED";
+    return { month, category, hashKey: `betai:blacklist:${category}:${month}`, legacyKey: `betai:${category}:${month}` };
+}
 
-        const rawJson = await redis.hget(hashKey, fieldName);
+function parseEntry(value: any) {
+    if (typeof value !== 'string') return value;
+    try { return JSON.parse(value); } catch { return value; }
+}
 
-        let blacklist = {};
-        if (rawJson) {
-            // @ts-ignore
-            blacklist = typeof rawJson === 'string' ? JSON.parse(rawJson) : rawJson;
+export async function GET(req: NextRequest) {
+    try {
+        const { month, category, hashKey, legacyKey } = resolveParams(req);
+
+        const [entries, legacyRaw] = await Promise.all([
+            redis.hgetall(hashKey),
+            redis.hget(legacyKey, LEGACY_FIELD)
+        ]);
+
+        const blacklist: Record<string, any> = {};
+        // Month not migrated yet: legacy entries first, per-field entries win
+        if (legacyRaw) {
+            Object.assign(blacklist, parseEntry(legacyRaw) || {});
+        }
+        for (const [id, value] of Object.entries(entries || {})) {
+            blacklist[id] = parseEntry(value);
         }
 
-        return NextResponse.json({ month, blacklist });
+        return NextResponse.json({ month, category, blacklist });
 
     } catch (error) {
         console.error("Blacklist GET Error:", error);
@@ -39,21 +58,15 @@ export async function GET(req: NextRequest) {
 
 export async function DELETE(req: NextRequest) {
     try {
-        const { searchParams } = new URL(req.url);
-        let month = searchParams.get('month');
-
-        if (!month) {
-            const now = new Date();
-            month = `${now.getFullYear()}-${(now.getMonth() + 1).toString().padStart(2, '0')}`;
-        }
-
-        const hashKey = `betai:daily_bets:${month}`;
-        const fieldName = "ID_RESULT_FAILED";
+        const { month, category, hashKey, legacyKey } = resolveParams(req);
 
-        // Clear the field
-        await redis.hdel(hashKey, fieldName);
+        // Clear the month bucket (and the legacy field if it is still there)
+        await Promise.all([
+            redis.del(hashKey),
+            redis.hdel(legacyKey, LEGACY_FIELD)
+        ]);
 
-        return NextResponse.json({ success: true, message: `Blacklist cleared for ${month}` });
+        return NextResponse.json({ success: true, message: `Blacklist cleared for ${month} (${category})` });
 
     } catch (error) {
         console.error("Blacklist DELETE Error:", error);
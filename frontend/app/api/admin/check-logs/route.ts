@@ -25,15 +25,26 @@ export async function GET(request: Request) {
             targetDate = now.toISOString().split('T')[0];
         }
 
+        // Large raw responses are stored apart: ?payload=<payload_id>
+        const payloadId = searchParams.get('payload');
+        if (payloadId) {
+            const payload = await redis.get(`betai:check_logs_payload:${payloadId}`);
+            return NextResponse.json({ payload_id: payloadId, payload });
+        }
+
         const key = `betai:check_logs:${targetDate}`;
 
-        // Fetch logs (List)
-        // lrange 0 -1 gets all
-        const rawLogs = await redis.lrange(key, 0, -1);
+        // Fetch logs (List, capped by the checker) + times each state was seen (repeats are not pushed again)
+        const [rawLogs, seen] = await Promise.all([
+            redis.lrange(key, 0, -1),
+            redis.hgetall<Record<string, number>>(`betai:check_logs_seen:${targetDate}`),
+        ]);
 
         const logs = rawLogs.map((logStr) => {
             try {
-                return typeof logStr === 'string' ? JSON.parse(logStr) : logStr;
+                const log = typeof logStr === 'string' ? JSON.parse(logStr) : logStr;
+                if (log && log.id && seen) log.count = Number(seen[log.id] || 1);
+                return log;
             } catch (e) {
                 return { message: "Invalid Log Format", raw: logStr };
             }
@@ -57,7 +68,8 @@ export async function DELETE(request: Request) {
         }
 
         const key = `betai:check_logs:${dateParam}`;
-        await redis.del(key);
+        // Also forget the seen states so the next run logs them again
+        await redis.del(key, `betai:check_logs_seen:${dateParam}`);
 
         return NextResponse.json({ message: 'Logs deleted successfully', date: dateParam });
 
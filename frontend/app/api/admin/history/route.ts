@@ -15,6 +15,18 @@ export async function GET(req: NextRequest) {
         const month = searchParams.get('month'); // YYYY-MM
         const yearParam = searchParams.get('year'); // YYYY
         const category = searchParams.get('category') || 'daily_bets'; // Default to legacy
+        const view = searchParams.get('view'); // 7d | 30d | 90d | all
+
+        // --- ROLLING / ALL-TIME VIEWS (precomputed by the checker, single GET) ---
+        if (view) {
+            const viewsRaw: any = await redis.get(`betai:stats_views:${category}`);
+            const views = typeof viewsRaw === 'string' ? JSON.parse(viewsRaw) : viewsRaw;
+            const stats = views?.views?.[view];
+            if (!stats) {
+                return NextResponse.json({ error: `View ${view} not available yet` }, { status: 404 });
+            }
+            return NextResponse.json({ view, category, stats, last_updated: views.last_updated });
+        }
 
         const prefix = "betai:";
         let statsHashKey = 'betai_stats'; // Default
@@ -62,6 +62,19 @@ export async function POST(request: Request) {
             await redis.set(redisKey, historyData);
             console.log(`[RESET-ATTEMPTS] Reset ${count} bets for ${date}`);
 
+            // Due index: reset selections are re-checked on the next checker run (score 0 = due now)
+            const dueMembers: { score: number; member: string }[] = [];
+            for (const bet of bets) {
+                if (bet.status !== 'PENDING') continue;
+                for (const sel of (bet.selections || [])) {
+                    if (sel.fixture_id) dueMembers.push({ score: 0, member: `daily_bets|${date}|${sel.fixture_id}` });
+                }
+            }
+            if (dueMembers.length > 0) {
+                const [first, ...rest] = dueMembers;
+                await redis.zadd('betai:due_index', first, ...rest);
+            }
+
             revalidatePath('/', 'layout');
 
             return NextResponse.json({ success: true, count, message: `Reset ${count} bets to 0 attempts` });
@@ -32,7 +32,28 @@ export async function GET(request: Request) {
             }
         }).filter(Boolean);
 
-        return NextResponse.json({ history, date: dateParam });
+        // Redis cost per run (written by the Python RedisService at exit)
+        const rawPerf = await redis.lrange(`betai:perf:${dateParam}`, 0, -1);
+        const perf = rawPerf.map((item) => {
+            try {
+                return typeof item === 'string' ? JSON.parse(item) : item;
+            } catch (e) {
+                return null;
+            }
+        }).filter(Boolean);
+
+        // Attach each perf summary to the closest finishing event of the same script
+        perf.forEach((p: any) => {
+            let best: any = null;
+            history.forEach((h: any) => {
+                if (h.script !== p.script || h.status === 'START') return;
+                const delta = Math.abs((h.timestamp || 0) - (p.timestamp || 0));
+                if (delta < 600 && (!best || delta < best.delta)) best = { h, delta };
+            });
+            if (best) best.h.redis = p;
+        });
+
+        return NextResponse.json({ history, perf, date: dateParam });
     } catch (error) {
         console.error('Error fetching execution history:', error);
         return NextResponse.json({ error: 'Internal Server Error' }, { status: 500 });
@@ -12,7 +12,11 @@ export async function POST(request: Request) {
     }
 
     try {
-        console.log(`[GitHub API] Triggering workflow ${workflowId} for ${owner}/${repo}...`);
+        // Optional { noCache: true } -> the analysis ignores the Gemini response cache and regenerates
+        const body = await request.json().catch(() => ({}));
+        const noCache = Boolean(body?.noCache);
+
+        console.log(`[GitHub API] Triggering workflow ${workflowId} for ${owner}/${repo}${noCache ? ' (no cache)' : ''}...`);
 
         const response = await fetch(`https://api.github.com/repos/${owner}/${repo}/actions/workflows/${workflowId}/dispatches`, {
             method: 'POST',
@@ -23,7 +27,7 @@ export async function POST(request: Request) {
             },
             body: JSON.stringify({
                 ref: ref,
-                inputs: {}
+                inputs: { no_cache: String(noCache) }
             })
         });
 
@@ -242,6 +242,29 @@ export async function POST(request: Request) {
             await redis.set(masterKey, jsonStr);
         }
 
+        // C) Due index: open selections are picked up by the next checker run (score 0 = due now)
+        const openMembers: { score: number; member: string }[] = [];
+        const dayBets: any[] = Array.isArray(historyData.bets) ? historyData.bets : Object.values(historyData.bets || {});
+        dayBets.forEach((b: any) => {
+            if (['WON', 'VOID', 'PUSH', 'MANUAL_CHECK'].includes(normalizeStatus(b.status) || '')) return;
+            (b.selections || []).forEach((sel: any) => {
+                const s = normalizeStatus(sel.status || 'PENDING');
+                if (sel.fixture_id && (s === 'PENDING' || !s)) {
+                    openMembers.push({ score: 0, member: `${category}|${date}|${sel.fixture_id}` });
+                }
+            });
+        });
+        if (openMembers.length > 0) {
+            const [first, ...rest] = openMembers;
+            await redis.zadd('betai:due_index', first, ...rest);
+        }
+
+        // D) Incremental stats (checker): the edited day is re-read on the next publish (monthly + rolling views ledger)
+        await Promise.all([
+            redis.hset(`betai:stats_agg:${category}:${date.substring(0, 7)}`, { [`dirty:${date}`]: 1 }),
+            redis.hset(`betai:stats_ledger:${category}`, { [`dirty:${date}`]: 1 })
+        ]);
+
         // 7. STATS
         await updateMonthStats(date, category);
 
@@ -279,6 +279,11 @@ export default function ExecutionTimeline({ scriptsStatus, history = [] }: Timel
                                 <div className="absolute bottom-full mb-2 left-1/2 -translate-x-1/2 hidden group-hover:block w-max bg-black/90 border border-white/10 px-2 py-1 rounded text-[10px] text-white z-50 pointer-events-none whitespace-nowrap uppercase tracking-wider">
                                     <div className="font-bold">{evt.label}</div>
                                     <div className="font-mono text-white/70">{evt.time} - {evt.status}</div>
+                                    {evt.redis && (
+                                        <div className="font-mono text-white/50 normal-case">
+                                            Redis: {evt.redis.commands} cmds / {evt.redis.round_trips} RT · p95 {evt.redis.p95_ms}ms
+                                        </div>
+                                    )}
                                 </div>
                             </div>
                         );
@@ -1,4 +1,5 @@
 import { Redis } from '@upstash/redis';
+import { inflateSync } from 'zlib';
 
 export const redis = new Redis({
     url: process.env.UPSTASH_REDIS_REST_URL!,
@@ -101,9 +102,27 @@ export async function getRawMatches(dateStr: string, isTikTok = false) {
         console.log(`[Admin/Utils] Fetching RAW matches from ${key} for date ${dateStr}`);
         const data = await redis.hget(key, dateStr);
 
-        return data;
+        return decodeRedisPayload(data);
     } catch (error) {
         console.error("Error reading RAW matches from Redis:", error);
         return null;
     }
 }
+
+// Payloads escritos por el backend con RedisCodec: "BZ1" + serializer + compressor + ":" + base64.
+// Solo soportamos JSON (j) sin comprimir (n) o zlib (z): el backend rechaza otros REDIS_CODEC al arrancar
+// (get_codec en redis_codec.py). El JSON legacy ya llega deserializado.
+export function decodeRedisPayload(data: any) {
+    if (typeof data !== 'string' || !data.startsWith('BZ1') || data.charAt(5) !== ':') return data;
+
+    const serializer = data.charAt(3);
+    const compressor = data.charAt(4);
+    if (serializer !== 'j' || (compressor !== 'z' && compressor !== 'n')) {
+        console.error(`[Admin/Utils] Unsupported Redis codec '${data.substring(0, 5)}'`);
+        return null;
+    }
+
+    const blob = Buffer.from(data.substring(6), 'base64');
+    const text = compressor === 'z' ? inflateSync(blob).toString('utf-8') : blob.toString('utf-8');
+    return JSON.parse(text);
+}
@@ -0,0 +1,42 @@
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
+
+from src.services.player_index import PlayerIndex, MIN_CONFIDENCE
+
+# Plantillas como las de fixtures/players (solo "name")
+ROSTER = [{"name": "Bruno Fernandes"}, {"name": "Vinícius Júnior"}, {"name": "K. Mbappé"}]
+
+# (pick, jugador esperado o None si no debe liquidarse)
+CASES = [
+    ("Bruno Fernandes Más de 0.5 remates", "Bruno Fernandes"),
+    ("Fernandes Más de 1.5 tiros", "Bruno Fernandes"),
+    ("Vinícius Jr Más de 0.5 remates a puerta", "Vinícius Júnior"),
+    ("Vinicius Junior tarjetas", "Vinícius Júnior"),
+    ("Kylian Mbappé Más de 2.5 remates", "K. Mbappé"),
+    ("Mbape Más de 0.5 goles", "K. Mbappé"),
+    # Nombre compartido / sufijo como nombre: otro jugador, no se liquida
+    ("Bruno Guimarães Más de 0.5 remates", None),
+    ("Junior Firpo tarjetas", None),
+    ("Vinícius Tobias tarjetas", None),
+]
+
+
+def resolve(index, pick):
+    player, confidence = index.lookup(pick)
+    return (player or {}).get("name") if confidence >= MIN_CONFIDENCE else None
+
+
+def test_player_index():
+    index = PlayerIndex(ROSTER)
+    failures = []
+    for pick, expected in CASES:
+        result = resolve(index, pick)
+        print(f"Pick: '{pick}' | Expected: {expected} | Result: {result} | {'OK' if result == expected else 'FAIL'}")
+        if result != expected: failures.append(pick)
+    assert not failures, failures
+
+
+if __name__ == "__main__":
+    test_player_index()
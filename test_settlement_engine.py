@@ -0,0 +1,109 @@
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
+
+from src.services.pick_compiler import compile_selection
+from src.services import settlement_engine
+from src.services.settlement_engine import settle_rows, aggregate_bets
+
+# Resultados sintéticos (formato de get_football_result / get_basketball_result)
+FT_2_1 = {"status": "FINISHED", "home_score": 2, "away_score": 1, "home_score_ht": 1, "away_score_ht": 0, "corners": 11, "cards": None}
+FT_1_1 = {"status": "FINISHED", "home_score": 1, "away_score": 1, "home_score_ht": 0, "away_score_ht": 1, "corners": None}
+FT_2_0 = {"status": "FINISHED", "home_score": 2, "away_score": 0, "home_score_ht": 2, "away_score_ht": 0, "corners": 7}
+BK_110_105 = {"status": "FINISHED", "home_score": 110, "away_score": 105, "home_score_ht": 58, "away_score_ht": 50}
+
+MATCH = "Real Madrid vs Barcelona"
+BK_MATCH = "Lakers vs Celtics"
+
+# (pick, partido, deporte, resultado, estado esperado, texto esperado) - reglas del check_bets original
+CASES = [
+    # Totales (sin push en líneas enteras: 3 goles con "Más de 3" pierde)
+    ("Más de 2.5 goles", MATCH, "football", FT_2_1, "WON", "2-1 | 3 Goles"),
+    ("Menos de 2.5 goles", MATCH, "football", FT_2_1, "LOST", "2-1 | 3 Goles"),
+    ("Más de 3 goles", MATCH, "football", FT_2_1, "LOST", "2-1 | 3 Goles"),
+    ("Más de 210.5 puntos", BK_MATCH, "basketball", BK_110_105, "WON", "110-105 | 215 Puntos"),
+    # Hándicap: push -> VOID
+    ("Real Madrid -1", MATCH, "football", FT_2_1, "VOID", "2-1 (Push)"),
+    ("Real Madrid -0.5", MATCH, "football", FT_2_1, "WON", "2-1 | +0"),
+    # DNB / empate
+    ("Real Madrid (DNB)", MATCH, "football", FT_1_1, "VOID", "1-1 (Void)"),
+    ("Empate", MATCH, "football", FT_1_1, "WON", "1-1"),
+    ("Gana Real Madrid", MATCH, "football", FT_1_1, "LOST", "1-1"),
+    # Doble oportunidad
+    ("Doble oportunidad 1X", MATCH, "football", FT_1_1, "WON", "1-1"),
+    ("Doble oportunidad X2", MATCH, "football", FT_2_1, "LOST", "2-1"),
+    # BTTS
+    ("Ambos marcan: Sí", MATCH, "football", FT_2_1, "WON", "2-1"),
+    ("Ambos marcan: No", MATCH, "football", FT_2_0, "WON", "2-0"),
+    ("Ambos marcan: Sí", MATCH, "football", FT_2_0, "LOST", "2-0"),
+    # Córners (sin datos -> ERROR: el checker lo deja pendiente y lo pone en blacklist) / tarjetas sin datos = 0
+    ("Más de 9.5 córners", MATCH, "football", FT_2_1, "WON", "2-1 | 11 Córners"),
+    ("Más de 9.5 córners", MATCH, "football", FT_1_1, "ERROR", None),
+    ("Más de 4.5 tarjetas", MATCH, "football", FT_2_1, "LOST", "2-1 | 0 Tarjetas"),
+    # Combinadas ganador + goles
+    ("Real Madrid y Más de 2.5 goles", MATCH, "football", FT_2_1, "WON", "2-1 (Combo)"),
+    ("Real Madrid y Más de 2.5 goles", MATCH, "football", FT_2_0, "LOST", "2-0 (Combo)"),
+]
+
+# (stake, [(estado selección, cuota)], estado esperado, profit esperado)
+BETS = [
+    (10, [("WON", 1.5), ("WON", 2.0)], "WON", 20.0),
+    (10, [("WON", 1.5), ("VOID", 2.0)], "WON", 5.0),
+    (10, [("VOID", 1.5), ("NULA", 2.0)], "VOID", 0.0),
+    (10, [("WON", 1.5), ("LOST", 2.0)], "LOST", -10),
+    (10, [("WON", 1.5), ("PENDING", 2.0)], None, None),
+    (10, [("LOST", 1.5), ("PENDING", 2.0)], "LOST", -10),
+]
+
+
+def _check_settle_rows():
+    rows = [(compile_selection({"pick": pick, "match": match, "sport": sport}), data, sport, lambda p: None)
+            for pick, match, sport, data, _, _ in CASES]
+    failures = []
+    for (pick, _, _, _, status, result), (got_status, got_result, _) in zip(CASES, settle_rows(rows)):
+        ok = got_status == status and (result is None or got_result == result)
+        print(f"Pick: '{pick}' | Expected: {status} {result} | Result: {got_status} {got_result} | {'OK' if ok else 'FAIL'}")
+        if not ok: failures.append(pick)
+    assert not failures, failures
+
+
+def _check_aggregate_bets():
+    outcomes = aggregate_bets([(stake, sels) for stake, sels, _, _ in BETS])
+    for (stake, sels, status, profit), got in zip(BETS, outcomes):
+        print(f"Bet: {sels} | Expected: {status} {profit} | Result: {got[0]} {got[1]}")
+        assert got == (status, profit)
+
+
+def _both_paths(check):
+    """ Máscaras NumPy y camino escalar (sin NumPy) deben dar lo mismo """
+    numpy_available = settlement_engine.NUMPY_AVAILABLE
+    try:
+        for mode in ([True, False] if numpy_available else [False]):
+            settlement_engine.NUMPY_AVAILABLE = mode
+            check()
+    finally:
+        settlement_engine.NUMPY_AVAILABLE = numpy_available
+
+
+def test_settle_rows():
+    _both_paths(_check_settle_rows)
+
+
+def test_aggregate_bets():
+    _both_paths(_check_aggregate_bets)
+
+
+def test_combo_ticket():
+    """ Settlement + agregado de una combinada completa, como en check_bets """
+    picks = [("Más de 2.5 goles", FT_2_1, 1.6), ("Doble oportunidad 1X", FT_1_1, 1.3), ("Real Madrid -1", FT_2_1, 1.9)]
+    settled = settle_rows([(compile_selection({"pick": p, "match": MATCH}), d, "football", lambda x: None) for p, d, _ in picks])
+    outcome = aggregate_bets([(5, [(s[0], odd) for s, (_, _, odd) in zip(settled, picks)])])
+    assert [s[0] for s in settled] == ["WON", "WON", "VOID"]
+    assert outcome == [("WON", round(5 * (1.6 * 1.3 - 1), 2))]
+
+
+if __name__ == "__main__":
+    test_settle_rows()
+    test_aggregate_bets()
+    test_combo_ticket()